@@ -0,0 +1,305 @@
+"""音频文件读取
+
+WavReader通过mmap直接映射WAV数据块，按块输出归一化的float32单声道数据，
+读完的块通知内核回收映射页，内存占用与录音长度无关。
+FFmpegReader把FFmpeg解码输出通过管道和有界队列送给分析端，解码与分析同时进行，
+默认保持文件的原始采样率，不做重采样。
+"""
+import json
+import mmap
+import os
+import queue
+import struct
+import subprocess
+import threading
+
+import numpy as np
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+DEFAULT_BLOCK_SIZE = 1024 * 2048
+# 无法探测文件采样率时的解码采样率
+FALLBACK_SAMPLE_RATE = 44100
+# 报告FFmpeg错误前等待stderr读取线程结束的最长时间（秒）
+STDERR_JOIN_TIMEOUT = 5.0
+
+
+class WavReader:
+    """基于mmap的WAV分块读取器"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._parse_header()
+        self._mmap = None
+        if self.n_frames > 0:
+            with open(filename, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._data = np.frombuffer(self._mmap, dtype=self._dtype,
+                                       count=self.n_frames * self._columns,
+                                       offset=self._data_offset).reshape(self.n_frames, self._columns)
+        else:
+            self._data = np.zeros((0, self._columns), dtype=self._dtype)
+
+    def _parse_header(self):
+        """解析RIFF头，找到fmt和data块"""
+        with open(self.filename, 'rb') as f:
+            riff, _, wave_id = struct.unpack('<4sI4s', f.read(12))
+            if riff not in (b'RIFF', b'RF64') or wave_id != b'WAVE':
+                raise ValueError("不是有效的WAV文件")
+
+            f.seek(0, 2)
+            file_size = f.tell()
+            f.seek(12)
+
+            fmt = None
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    raise ValueError("WAV文件缺少data块")
+                chunk_id, chunk_size = struct.unpack('<4sI', header)
+                if chunk_id == b'fmt ':
+                    fmt = f.read(chunk_size)
+                    f.seek(chunk_size % 2, 1)
+                elif chunk_id == b'data':
+                    if fmt is None:
+                        raise ValueError("WAV文件缺少fmt块")
+                    self._data_offset = f.tell()
+                    # 录音中断的文件data长度可能不正确，以实际文件大小为准
+                    data_size = min(chunk_size, file_size - self._data_offset)
+                    break
+                else:
+                    f.seek(chunk_size + chunk_size % 2, 1)
+
+        format_tag, self.n_channels, self.sample_rate, _, block_align, bits = \
+            struct.unpack('<HHIIHH', fmt[:16])
+        if format_tag == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+            format_tag = struct.unpack('<H', fmt[24:26])[0]
+
+        self.sample_width = bits // 8
+        self.n_frames = data_size // block_align
+        self._columns = self.n_channels
+
+        if format_tag == WAVE_FORMAT_IEEE_FLOAT and self.sample_width in (4, 8):
+            self._dtype = '<f4' if self.sample_width == 4 else '<f8'
+            self._offset, self._scale = 0.0, 1.0
+        elif format_tag == WAVE_FORMAT_PCM and self.sample_width == 1:
+            # 8位WAV为无符号数
+            self._dtype = np.uint8
+            self._offset, self._scale = 128.0, 128.0
+        elif format_tag == WAVE_FORMAT_PCM and self.sample_width == 2:
+            self._dtype = '<i2'
+            self._offset, self._scale = 0.0, 32768.0
+        elif format_tag == WAVE_FORMAT_PCM and self.sample_width == 3:
+            # 24位数据按字节映射，读取时再拼成整数
+            self._dtype = np.uint8
+            self._columns = self.n_channels * 3
+            self._offset, self._scale = 0.0, 8388608.0
+        elif format_tag == WAVE_FORMAT_PCM and self.sample_width == 4:
+            self._dtype = '<i4'
+            self._offset, self._scale = 0.0, 2147483648.0
+        else:
+            raise ValueError(f"不支持的WAV格式: 格式{format_tag}, {bits}位")
+
+    @property
+    def duration(self):
+        """录音时长（秒）"""
+        return self.n_frames / self.sample_rate if self.sample_rate else 0.0
+
+    def _convert(self, raw):
+        """把一块原始采样转换为归一化的float32单声道数据"""
+        if self.sample_width == 3:
+            raw = raw.reshape(len(raw), self.n_channels, 3).astype(np.int32)
+            raw = raw[..., 0] | (raw[..., 1] << 8) | (raw[..., 2] << 16)
+            raw = np.where(raw >= 0x800000, raw - 0x1000000, raw)
+
+        if self.n_channels > 1:
+            block = raw.mean(axis=1, dtype=np.float64).astype(np.float32)
+        else:
+            block = raw[:, 0].astype(np.float32)
+        if self._offset:
+            block -= self._offset
+        if self._scale != 1.0:
+            block /= self._scale
+        return block
+
+    def blocks(self, block_size=DEFAULT_BLOCK_SIZE, start_frame=0, end_frame=None):
+        """逐块输出 [start_frame, end_frame) 的float32单声道数据，每块最多block_size个采样"""
+        end_frame = self.n_frames if end_frame is None else min(end_frame, self.n_frames)
+        for i in range(start_frame, end_frame, block_size):
+            stop = min(i + block_size, end_frame)
+            block = self._convert(self._data[i:stop])
+            self._release(i, stop)
+            yield block
+
+    def _release(self, start_frame, end_frame):
+        """读完的采样范围交还内核（只回收整页，数据仍在文件缓存中，再次读取时重新映射）"""
+        if self._mmap is None or not hasattr(mmap, 'MADV_DONTNEED'):
+            return
+        frame_bytes = self._data.strides[0]
+        start = self._data_offset + start_frame * frame_bytes
+        start -= start % mmap.PAGESIZE
+        end = self._data_offset + end_frame * frame_bytes
+        end -= end % mmap.PAGESIZE
+        if end > start:
+            self._mmap.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+    def read(self):
+        """读取全部数据"""
+        return self._convert(self._data[:])
+
+    def close(self):
+        # 已输出的块都是拷贝，不引用映射；映射随最后一个引用释放
+        self._data = None
+        self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class FFmpegReader:
+    """通过FFmpeg管道流式解码其他格式音频（m4a、mp3等）
+
+    后台线程读取FFmpeg输出的s16le数据放入有界队列，分析端取出时解码仍在进行，
+    队列满时解码线程等待，内存占用有上限。
+    """
+
+    def __init__(self, filename, sample_rate=None, queue_blocks=8):
+        self.filename = filename
+        native_rate, duration = probe_audio(filename)
+        # 未指定采样率时按文件原始采样率解码
+        self.sample_rate = sample_rate or native_rate or FALLBACK_SAMPLE_RATE
+        # 由容器时长估计的采样数，只用于显示进度，无法探测时为None
+        self.n_frames = int(duration * self.sample_rate) if duration else None
+        self.queue_blocks = queue_blocks
+        self._process = None
+        self._stderr = b""
+        self._stderr_thread = None
+        self._stop = threading.Event()
+
+    def _start(self, block_size):
+        cmd = [
+            'ffmpeg', '-nostdin', '-v', 'error',
+            '-i', self.filename,
+            '-ac', '1',
+            '-ar', str(self.sample_rate),
+            '-f', 's16le',
+            '-acodec', 'pcm_s16le',
+            '-'
+        ]
+        try:
+            self._process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                             bufsize=block_size * 2)
+        except FileNotFoundError:
+            raise Exception("未找到FFmpeg，请先安装FFmpeg并加入PATH")
+
+        blocks = queue.Queue(maxsize=self.queue_blocks)
+        process = self._process
+        self._stop.clear()
+
+        def put(item):
+            # 分析端提前结束时不再等待队列空位
+            while not self._stop.is_set():
+                try:
+                    blocks.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def read_stderr():
+            self._stderr = process.stderr.read()
+
+        def read_stdout():
+            try:
+                while True:
+                    data = process.stdout.read(block_size * 2)
+                    if not data:
+                        break
+                    # 奇数字节说明输出被截断，丢弃最后半个采样
+                    data = data[:len(data) - len(data) % 2]
+                    block = np.frombuffer(data, dtype='<i2').astype(np.float32) / 32768.0
+                    put(block)
+            finally:
+                put(None)
+
+        self._stderr_thread = threading.Thread(target=read_stderr, daemon=True)
+        self._stderr_thread.start()
+        threading.Thread(target=read_stdout, daemon=True).start()
+        return blocks
+
+    def blocks(self, block_size=DEFAULT_BLOCK_SIZE):
+        """逐块输出float32单声道数据，每块最多block_size个采样"""
+        blocks = self._start(block_size)
+        try:
+            while True:
+                block = blocks.get()
+                if block is None:
+                    break
+                yield block
+            if self._process.wait() != 0:
+                # 进程退出后stderr随即关闭，等读取线程收完错误信息再报告
+                self._join_stderr()
+                raise Exception(f"FFmpeg解码失败: {self._stderr.decode('utf-8', 'replace')}")
+        finally:
+            self.close()
+
+    def read(self):
+        """读取全部数据"""
+        blocks = list(self.blocks())
+        return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+
+    def close(self):
+        """结束FFmpeg进程"""
+        self._stop.set()
+        if self._process and self._process.poll() is None:
+            self._process.kill()
+            self._process.wait()
+        self._join_stderr()
+
+    def _join_stderr(self):
+        if self._stderr_thread:
+            self._stderr_thread.join(timeout=STDERR_JOIN_TIMEOUT)
+            self._stderr_thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def probe_audio(filename):
+    """用ffprobe读取首个音频流的采样率和文件时长（秒），读取失败的项为None"""
+    cmd = [
+        'ffprobe', '-v', 'error',
+        '-select_streams', 'a:0',
+        '-show_entries', 'stream=sample_rate:format=duration',
+        '-of', 'json',
+        filename
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, timeout=30)
+        info = json.loads(result.stdout.decode('utf-8', 'replace') or '{}')
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None, None
+    sample_rate = duration = None
+    try:
+        sample_rate = int(info['streams'][0]['sample_rate'])
+    except (KeyError, IndexError, TypeError, ValueError):
+        pass
+    try:
+        duration = float(info['format']['duration'])
+    except (KeyError, TypeError, ValueError):
+        pass
+    return sample_rate, duration
+
+
+def open_audio(filename, **kwargs):
+    """根据扩展名选择WAV映射读取或FFmpeg流式解码"""
+    if os.path.splitext(filename)[1].lower() == '.wav':
+        return WavReader(filename)
+    return FFmpegReader(filename, **kwargs)
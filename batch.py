@@ -0,0 +1,199 @@
+"""命令行批量分析
+
+用法:
+    python main.py 录音目录/ [更多目录或通配符...] -o 结果目录
+    python batch.py "2024-06-*/*.m4a" -j 8
+
+按config.json中的参数并行分析多个录音文件，每个文件输出一份JSON结果
+（字段与pile_details一致），并生成汇总summary.json和summary.csv。
+文件数少于进程数时，空闲的进程用于长WAV录音的分段并行分析。
+不需要显示器，也不导入tkinter和sounddevice。
+"""
+import argparse
+import csv
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from audio_io import WavReader, open_audio
+from detector import DEFAULT_PARAMS, PileEvent, StrikeDetector
+from segments import DEFAULT_SEGMENT_SECONDS, analyze_file_segments
+
+AUDIO_EXTENSIONS = ('.wav', '.m4a', '.mp3', '.flac', '.ogg')
+CHUNK_SIZE = 1024
+
+
+def load_config(config_file):
+    """读取config.json，文件不存在时使用默认参数"""
+    config = dict(DEFAULT_PARAMS, file_analysis_threshold_multiplier=1.0)
+    if config_file and os.path.exists(config_file):
+        with open(config_file, 'r', encoding='utf-8') as f:
+            config.update(json.load(f))
+    return config
+
+
+def collect_files(inputs, recursive=False):
+    """展开目录和通配符，返回去重排序后的音频文件列表"""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, '**', '*') if recursive else os.path.join(item, '*')
+            candidates = glob.glob(pattern, recursive=recursive)
+        else:
+            candidates = glob.glob(item, recursive=recursive) or [item]
+        files.extend(path for path in candidates
+                     if os.path.isfile(path) and path.lower().endswith(AUDIO_EXTENSIONS))
+    return sorted(set(files))
+
+
+def analyze_path(path, config, chunk_size=CHUNK_SIZE, jobs=1):
+    """分析单个文件（在工作进程中运行），jobs大于1时长WAV录音分段并行分析"""
+    start = time.time()
+    try:
+        with open_audio(path) as reader:
+            detector = StrikeDetector.from_config(config, file_mode=True,
+                                                  sample_rate=reader.sample_rate,
+                                                  chunk_size=chunk_size)
+            sample_rate = reader.sample_rate
+            segmented = (jobs > 1 and isinstance(reader, WavReader) and
+                         reader.n_frames > DEFAULT_SEGMENT_SECONDS * sample_rate)
+            events = []
+            if not segmented:
+                for block in reader.blocks(chunk_size * 2048):
+                    events.extend(event for event in detector.process_signal(block)
+                                  if isinstance(event, PileEvent))
+        if segmented:
+            segment_events, _ = analyze_file_segments(path, detector, jobs)
+            events.extend(event for event in segment_events if isinstance(event, PileEvent))
+        events.extend(detector.finish())
+    except Exception as e:
+        return {'file': path, 'error': str(e)}
+
+    piles = [event.pile.to_dict() for event in events]
+    duration = detector.samples_seen / sample_rate
+    elapsed = time.time() - start
+    return {
+        'file': path,
+        'sample_rate': sample_rate,
+        'duration': duration,
+        'elapsed': elapsed,
+        'realtime_factor': duration / elapsed if elapsed > 0 else 0.0,
+        'parameters': {
+            'threshold': detector.threshold,
+            'min_frequency': detector.min_frequency,
+            'max_frequency': detector.max_frequency,
+            'min_interval': detector.min_interval,
+            'silence_duration': detector.silence_duration,
+            'detection_mode': detector.detection_mode,
+            'decimate': detector.decimate,
+        },
+        'total_piles': len(piles),
+        'total_strikes': sum(pile['strikes'] for pile in piles),
+        'pile_details': piles,
+    }
+
+
+def result_filename(output_dir, path, used):
+    """每个录音对应的结果文件名，不同目录下的同名文件加序号区分"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    candidate, index = name, 2
+    while candidate in used:
+        candidate, index = f"{name}_{index}", index + 1
+    used.add(candidate)
+    return os.path.join(output_dir, f"{candidate}.piles.json")
+
+
+def summarize(results):
+    """生成汇总统计"""
+    ok = [result for result in results if 'error' not in result]
+    pile_strikes = [pile['strikes'] for result in ok for pile in result['pile_details']]
+    return {
+        'generated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'files': len(results),
+        'failed': len(results) - len(ok),
+        'total_piles': len(pile_strikes),
+        'total_strikes': sum(pile_strikes),
+        'avg_strikes': sum(pile_strikes) / len(pile_strikes) if pile_strikes else 0.0,
+        'max_strikes': max(pile_strikes) if pile_strikes else 0,
+        'min_strikes': min(pile_strikes) if pile_strikes else 0,
+        'total_duration': sum(result['duration'] for result in ok),
+        'per_file': [
+            {key: result.get(key) for key in
+             ('file', 'total_piles', 'total_strikes', 'duration', 'realtime_factor', 'error')}
+            for result in results
+        ],
+    }
+
+
+def write_summary(output_dir, summary):
+    with open(os.path.join(output_dir, 'summary.json'), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    with open(os.path.join(output_dir, 'summary.csv'), 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['文件', '桩数', '锤击数', '时长(秒)', '实时倍数', '错误'])
+        for row in summary['per_file']:
+            writer.writerow([row['file'], row['total_piles'], row['total_strikes'],
+                             f"{row['duration']:.1f}" if row['duration'] else "",
+                             f"{row['realtime_factor']:.1f}" if row['realtime_factor'] else "",
+                             row['error'] or ""])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="打桩锤击计数 - 批量分析录音文件")
+    parser.add_argument('inputs', nargs='+', help="录音目录、文件或通配符")
+    parser.add_argument('-o', '--output', default='batch_results', help="结果输出目录")
+    parser.add_argument('-c', '--config', default='config.json', help="检测参数配置文件")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help="并行进程数")
+    parser.add_argument('-r', '--recursive', action='store_true', help="递归搜索子目录")
+    parser.add_argument('--decimate', action='store_true', help="分析前先抽取降采样（加快长录音分析）")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = load_config(args.config)
+    if args.decimate:
+        config['analysis_decimation'] = True
+    files = collect_files(args.inputs, args.recursive)
+    if not files:
+        print("未找到音频文件", file=sys.stderr)
+        return 1
+
+    os.makedirs(args.output, exist_ok=True)
+    print(f"共 {len(files)} 个文件，{args.jobs} 个进程")
+
+    results = []
+    # 按输入顺序确定结果文件名，同名文件的序号不受完成先后影响
+    used_names = set()
+    output_files = [result_filename(args.output, path, used_names) for path in files]
+    segment_jobs = max(1, args.jobs // len(files))
+    with ProcessPoolExecutor(max_workers=min(args.jobs, len(files)),
+                             mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {pool.submit(analyze_path, path, config, CHUNK_SIZE, segment_jobs): output_file
+                   for path, output_file in zip(files, output_files)}
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if 'error' in result:
+                print(f"❌ {result['file']}: {result['error']}")
+                continue
+            with open(futures[future], 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+            print(f"✅ {result['file']}: {result['total_piles']}桩, {result['total_strikes']}次, "
+                  f"{result['realtime_factor']:.0f}x实时")
+
+    results.sort(key=lambda result: result['file'])
+    summary = summarize(results)
+    write_summary(args.output, summary)
+    print(f"📈 汇总: {summary['total_piles']}桩, {summary['total_strikes']}次, "
+          f"失败{summary['failed']}个文件 -> {args.output}")
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
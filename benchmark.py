@@ -0,0 +1,283 @@
+"""检测吞吐量和准确率基准测试
+
+用法:
+    python benchmark.py                                  # 1分钟、10分钟、1小时合成录音
+    python benchmark.py --lengths 600 3600 --paths file batch -o bench.json
+    python benchmark.py --compare bench.json             # 与基线比较，变差时返回1
+
+用synthetic.py生成带真实锤击时间的合成录音，对每条检测路径和每个录音长度报告
+实时倍数、峰值内存和计数误差。每次测量在新的子进程中运行，峰值内存互不影响。
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from audio_io import WavReader
+from batch import analyze_path
+from detector import StrikeDetector, StrikeEvent
+from feature_cache import load_features
+from profiling import current_rss_mb, peak_rss_mb
+from realtime import AnalysisWorker, RingBuffer, StreamClock, DEFAULT_RING_SECONDS
+from replay import ReplayStream
+from synthetic import SyntheticRecording, SyntheticSpec, match_strikes
+
+CHUNK_SIZE = 1024
+DEFAULT_LENGTHS = (60, 600, 3600)
+MATCH_TOLERANCE = 0.1
+
+# 与合成录音默认参数配套的检测参数
+BENCHMARK_PARAMS = {
+    'threshold': 0.1,
+    'min_frequency': 80,
+    'max_frequency': 2000,
+    'min_interval': 0.3,
+    'silence_duration': 120.0,
+}
+
+
+def _strike_times(events):
+    return [event.time for event in events if isinstance(event, StrikeEvent)]
+
+
+def _run_features(path, params, jobs=1):
+    """逐块特征（不使用缓存）送入状态机，与界面的文件分析一致"""
+    with WavReader(path) as reader:
+        detector = StrikeDetector(sample_rate=reader.sample_rate, chunk_size=CHUNK_SIZE, **params)
+    events = []
+
+    def on_features(end, total, features):
+        events.extend(detector.process_features(*features[:3]))
+
+    load_features(path, None, CHUNK_SIZE, min_frequency=params['min_frequency'],
+                  max_frequency=params['max_frequency'], jobs=jobs,
+                  on_features=on_features, keep=False)
+    return _strike_times(events)
+
+
+def run_file(path, params):
+    """文件分析路径"""
+    return _run_features(path, params)
+
+
+def run_segments(path, params):
+    """分段并行的文件分析路径（进程数为CPU核数）"""
+    return _run_features(path, params, jobs=0)
+
+
+def run_batch(path, params):
+    """命令行批量分析路径（音量门控FFT）"""
+    config = dict(params, file_analysis_threshold_multiplier=1.0)
+    result = analyze_path(path, config, CHUNK_SIZE)
+    if 'error' in result:
+        raise Exception(result['error'])
+    return [t for pile in result['pile_details'] for t in pile['strike_times']]
+
+
+def _run_stream(path, params, detection_mode):
+    with WavReader(path) as reader:
+        detector = StrikeDetector(sample_rate=reader.sample_rate, chunk_size=CHUNK_SIZE,
+                                  detection_mode=detection_mode, **params)
+        events = []
+        for block in reader.blocks(CHUNK_SIZE * 2048):
+            for start in range(0, len(block), CHUNK_SIZE):
+                events.extend(detector.process_block(block[start:start + CHUNK_SIZE]))
+    return _strike_times(events)
+
+
+def run_realtime(path, params):
+    """实时监测路径: 每次输入一帧给process_block()，与分析线程相同"""
+    return _run_stream(path, params, 'fft')
+
+
+def run_realtime_iir(path, params):
+    """实时监测路径的IIR带通包络模式"""
+    return _run_stream(path, params, 'iir')
+
+
+def run_replay(path, params):
+    """录音回放路径: 音频回调、环形缓冲区和分析线程与实时监测完全相同，尽快回放"""
+    events = []
+    finished = threading.Event()
+    stream = ReplayStream(path, CHUNK_SIZE, None, on_finished=finished.set)
+    ring = RingBuffer(int(stream.samplerate * DEFAULT_RING_SECONDS))
+    clock = StreamClock(stream.samplerate, wall_clock=stream.clock)
+    detector = StrikeDetector(sample_rate=stream.samplerate, chunk_size=CHUNK_SIZE, **params)
+    worker = AnalysisWorker(detector, ring, events.extend, clock=clock)
+
+    def callback(indata, frames, time_info, status):
+        ring.write(indata[:, 0], clock.on_callback(frames, time_info, status))
+
+    stream.callback = callback
+    stream.ready = lambda: ring.capacity - ring.available >= 2 * CHUNK_SIZE
+    worker.start()
+    stream.start()
+    finished.wait()
+    while ring.available >= CHUNK_SIZE:
+        time.sleep(0.001)
+    worker.stop()
+    stream.close()
+    start = stream.clock.start
+    return [t - start for t in _strike_times(events)]
+
+
+def run_iir(path, params):
+    """IIR模式的文件分析路径"""
+    with WavReader(path) as reader:
+        detector = StrikeDetector(sample_rate=reader.sample_rate, chunk_size=CHUNK_SIZE,
+                                  detection_mode='iir', **params)
+        events = []
+        for block in reader.blocks(CHUNK_SIZE * 2048):
+            events.extend(detector.process_signal(block))
+    return _strike_times(events)
+
+
+PATHS = {
+    'file': run_file,
+    'segments': run_segments,
+    'batch': run_batch,
+    'iir': run_iir,
+    'realtime': run_realtime,
+    'realtime_iir': run_realtime_iir,
+    'replay': run_replay,
+}
+DEFAULT_PATHS = ('file', 'batch', 'iir', 'realtime')
+
+
+def measure(name, path, params):
+    """在子进程中运行一条检测路径，返回耗时、峰值内存增量和检测到的锤击时间"""
+    baseline = current_rss_mb()
+    start = time.perf_counter()
+    strike_times = PATHS[name](path, params)
+    elapsed = time.perf_counter() - start
+    peak = peak_rss_mb()
+    return {
+        'elapsed': elapsed,
+        'peak_memory_mb': None if peak is None else max(peak - baseline, 0.0),
+        'strike_times': strike_times,
+    }
+
+
+def run_benchmark(lengths, paths, workdir, params=None, spec=None, log=print):
+    """生成各长度的合成录音并测量每条路径，返回结果列表"""
+    params = dict(BENCHMARK_PARAMS, **(params or {}))
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for length in lengths:
+        recording = SyntheticRecording(spec, duration=float(length))
+        wav_name = f"synthetic_{length}s_snr{recording.spec.snr_db:g}_seed{recording.spec.seed}.wav"
+        path = os.path.join(workdir, wav_name)
+        if not os.path.exists(path):
+            recording.write_wav(path)
+            with open(path + ".truth.json", 'w', encoding='utf-8') as f:
+                json.dump(recording.truth(), f)
+        truth = recording.strike_times
+        for name in paths:
+            # 每次测量用新进程，峰值内存只包含本次测量
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                measured = pool.submit(measure, name, path, params).result()
+            matched, missed, false = match_strikes(measured['strike_times'], truth, MATCH_TOLERANCE)
+            detected = len(measured['strike_times'])
+            result = {
+                'path': name,
+                'length': length,
+                'elapsed': measured['elapsed'],
+                'realtime_factor': recording.duration / measured['elapsed'] if measured['elapsed'] > 0 else 0.0,
+                'peak_memory_mb': measured['peak_memory_mb'],
+                'true_strikes': len(truth),
+                'detected_strikes': detected,
+                'count_error': detected - len(truth),
+                'missed': missed,
+                'false_detections': false,
+            }
+            results.append(result)
+            log(format_result(result))
+    return results
+
+
+def format_result(result):
+    memory = result['peak_memory_mb']
+    memory = f"{memory:8.1f}MB" if memory is not None else "       -  "
+    return (f"{result['path']:<13}{result['length']:>7}s  {result['realtime_factor']:>9.1f}x实时  "
+            f"{memory}  锤击 {result['detected_strikes']}/{result['true_strikes']} "
+            f"(误差{result['count_error']:+d}, 漏检{result['missed']}, 误检{result['false_detections']})")
+
+
+def compare(results, baseline, tolerance=0.2):
+    """与基线比较，返回退化项说明列表
+
+    实时倍数低于基线的 (1 - tolerance) 倍，或计数误差绝对值增大，都算退化。
+    """
+    previous = {(item['path'], item['length']): item for item in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get((result['path'], result['length']))
+        if old is None:
+            continue
+        label = f"{result['path']} {result['length']}s"
+        if result['realtime_factor'] < old['realtime_factor'] * (1 - tolerance):
+            regressions.append(f"{label}: 实时倍数 {old['realtime_factor']:.1f}x -> "
+                               f"{result['realtime_factor']:.1f}x")
+        if abs(result['count_error']) > abs(old['count_error']):
+            regressions.append(f"{label}: 计数误差 {old['count_error']:+d} -> "
+                               f"{result['count_error']:+d}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="打桩锤击计数 - 检测吞吐量和准确率基准测试")
+    parser.add_argument('--lengths', type=float, nargs='+', default=DEFAULT_LENGTHS,
+                        help="合成录音长度（秒）")
+    parser.add_argument('--paths', nargs='+', choices=sorted(PATHS), default=DEFAULT_PATHS,
+                        help="要测量的检测路径")
+    parser.add_argument('--snr', type=float, default=SyntheticSpec().snr_db, help="信噪比 (dB)")
+    parser.add_argument('--seed', type=int, default=0, help="合成录音随机种子")
+    parser.add_argument('--workdir', help="合成录音目录（默认临时目录，结束后删除）")
+    parser.add_argument('-o', '--output', help="结果JSON文件")
+    parser.add_argument('--compare', help="基线结果JSON文件")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="实时倍数允许下降的比例")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="pile_benchmark_")
+    os.makedirs(workdir, exist_ok=True)
+    spec = SyntheticSpec(snr_db=args.snr, seed=args.seed)
+    lengths = [int(length) if float(length).is_integer() else length for length in args.lengths]
+    try:
+        results = run_benchmark(lengths, args.paths, workdir, spec=spec)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'generated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'spec': spec._asdict(),
+                'params': BENCHMARK_PARAMS,
+                'results': results,
+            }, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"❌ {line}")
+        if regressions:
+            return 1
+        print("✅ 未发现退化")
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""文件分析断点
+
+长录音分析过程中定期把已分析位置、检测引擎状态和已完成的桩写入录音旁的断点文件，
+中途停止或程序崩溃后重新分析同一文件时从断点继续，不必从头开始。
+断点记录文件内容指纹和检测参数，任一项变化时断点失效。
+"""
+import json
+import os
+import time
+
+from detector import PileRecord
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+DEFAULT_CHECKPOINT_INTERVAL = 30.0
+
+
+def analysis_signature(filename, detector):
+    """断点对应的文件内容和检测参数"""
+    # 特征缓存模块带着分段并行的依赖，界面启动时不需要，用到时再导入
+    from feature_cache import file_fingerprint
+    return {
+        'fingerprint': file_fingerprint(filename),
+        'sample_rate': detector.sample_rate,
+        'chunk_size': detector.chunk_size,
+        'threshold': detector.threshold,
+        'min_frequency': detector.min_frequency,
+        'max_frequency': detector.max_frequency,
+        'min_interval': detector.min_interval,
+        'silence_duration': detector.silence_duration,
+        'detection_mode': detector.detection_mode,
+        'decimate': detector.decimate,
+    }
+
+
+class AnalysisCheckpoint:
+    """录音旁的断点文件，save()写临时文件后替换，中途崩溃不会留下损坏的断点"""
+
+    def __init__(self, filename, signature, interval=DEFAULT_CHECKPOINT_INTERVAL,
+                 clock=time.monotonic):
+        self.path = filename + CHECKPOINT_SUFFIX
+        self.signature = signature
+        self.interval = interval
+        self.error = None
+        self._clock = clock
+        self._last_save = clock()
+
+    def load(self):
+        """读取断点，不存在、损坏或与当前文件和参数不一致时返回None"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get('version') != CHECKPOINT_VERSION or state.get('signature') != self.signature:
+            return None
+        return state
+
+    def restore(self, detector):
+        """把断点恢复到detector，返回 (续算位置, 已完成的桩)，没有可用断点时返回 (0, [])"""
+        state = self.load()
+        if state is None:
+            return 0, []
+        try:
+            detector.set_state(state['detector'])
+            piles = [PileRecord.from_dict(record) for record in state['piles']]
+        except (KeyError, TypeError, ValueError):
+            detector.reset()
+            return 0, []
+        return int(state['position']), piles
+
+    def save(self, position, detector, piles):
+        """写入断点，失败时记录error并返回False（分析继续进行）"""
+        state = {
+            'version': CHECKPOINT_VERSION,
+            'signature': self.signature,
+            'saved_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'position': int(position),
+            'detector': detector.get_state(),
+            'piles': [pile.to_dict() for pile in piles],
+        }
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            self.error = str(e)
+            return False
+        finally:
+            self._last_save = self._clock()
+        return True
+
+    def maybe_save(self, position, detector, piles):
+        """距上次写入超过interval秒时写入断点"""
+        if self._clock() - self._last_save < self.interval:
+            return None
+        return self.save(position, detector, piles)
+
+    def remove(self):
+        """分析完成后删除断点"""
+        for path in (self.path, self.path + ".tmp"):
+            if os.path.exists(path):
+                os.unlink(path)
@@ -0,0 +1,677 @@
+"""打桩锤击检测引擎
+
+不依赖tkinter、sounddevice和sklearn，可在服务器、测试和工作进程中直接导入使用。
+实时监测、文件分析和阈值优化共用同一个状态机。
+"""
+from array import array
+from collections import namedtuple
+from time import perf_counter
+
+import numpy as np
+
+from decimate import Decimator, decimation_factor
+from bandpass import DETECTION_MODES, BandpassEnvelope, zero_crossing_frequency
+from spectral import band_ratio, get_extractor
+from stats import RunningStats
+
+# 检测事件
+# volume_mean / volume_std: 计入本次锤击后当前桩锤击音量的均值和标准差
+StrikeEvent = namedtuple('StrikeEvent', ['time', 'frequency', 'volume', 'pile_number', 'strike_number',
+                                         'volume_mean', 'volume_std'])
+PileEvent = namedtuple('PileEvent', ['time', 'pile'])
+# 界面显示用的检测状态快照，见StrikeDetector.status()
+DetectorStatus = namedtuple('DetectorStatus', [
+    'last_volume', 'last_frequency', 'last_band_ratio', 'pile_start_time', 'last_strike_time',
+    'pile_strikes', 'volume_min', 'volume_max', 'frequency_min', 'frequency_max'])
+
+# 频带能量特征的频带边界(Hz)，最后一个频带到奈奎斯特频率为止
+BAND_EDGES = (0, 63, 125, 250, 500, 1000, 2000, 4000, 8000)
+
+DEFAULT_PARAMS = {
+    'threshold': 0.3,
+    'min_frequency': 80,
+    'max_frequency': 2000,
+    'silence_duration': 600.0,
+    'min_interval': 0.3,
+}
+
+
+def compute_volume(audio_data):
+    """计算音频块的RMS音量"""
+    return float(np.sqrt(np.mean(np.square(audio_data))))
+
+
+def dominant_frequency(audio_data, sample_rate):
+    """计算音频数据的主频率"""
+    try:
+        if len(audio_data) == 0:
+            return 0.0
+        return get_extractor(sample_rate, len(audio_data)).analyze(audio_data).frequency
+    except Exception:
+        return 0.0
+
+
+def frame_signal(audio_data, frame_size, hop_size=None):
+    """用跨步视图把一维信号分成 (帧数, frame_size) 的二维数组，不复制数据
+
+    末尾不足一帧的采样不包含在结果中。
+    """
+    hop_size = hop_size or frame_size
+    audio_data = np.ascontiguousarray(audio_data)
+    if len(audio_data) < frame_size:
+        return np.empty((0, frame_size), dtype=audio_data.dtype)
+    frames = np.lib.stride_tricks.sliding_window_view(audio_data, frame_size)
+    return frames[::hop_size]
+
+
+def frame_volumes(frames):
+    """逐帧RMS音量"""
+    energy = np.einsum('ij,ij->i', frames, frames, dtype=np.float64)
+    return np.sqrt(energy / frames.shape[1])
+
+
+def _as_array(values):
+    """转换为array('d')，已经是array('d')时直接使用不复制"""
+    if isinstance(values, array) and values.typecode == 'd':
+        return values
+    return array('d', values)
+
+
+class PileRecord:
+    """一根桩的检测结果（与pile_details字段一致）
+
+    锤击时间、频率和音量保存在array('d')中，每个值占8字节，
+    桩完成时检测引擎直接移交数组，不复制。
+    """
+
+    __slots__ = ('number', 'name', 'strikes', 'start_time', 'end_time',
+                 'strike_times', 'strike_frequencies', 'strike_volumes',
+                 'frequency_range', 'volume_range', 'strikes_per_minute',
+                 'penetration_depth', 'elevation_height', 'construction_judgment')
+
+    def __init__(self, number, name, strikes, start_time, end_time,
+                 strike_times=(), strike_frequencies=(), strike_volumes=()):
+        self.number = number
+        self.name = name
+        self.strikes = strikes
+        self.start_time = float(start_time)
+        self.end_time = float(end_time)
+        self.strike_times = _as_array(strike_times)
+        self.strike_frequencies = _as_array(strike_frequencies)
+        self.strike_volumes = _as_array(strike_volumes)
+
+        self.frequency_range = "0-0 Hz"
+        self.volume_range = "0.0000-0.0000"
+        if self.strike_frequencies:
+            self.frequency_range = f"{min(self.strike_frequencies):.0f}-{max(self.strike_frequencies):.0f}Hz"
+        if self.strike_volumes:
+            self.volume_range = f"{min(self.strike_volumes):.4f}-{max(self.strike_volumes):.4f}"
+
+        self.update_rate()
+        self.penetration_depth = None
+        self.elevation_height = None
+        self.construction_judgment = "未判定"
+
+    @property
+    def duration(self):
+        return self.end_time - self.start_time
+
+    def update_rate(self):
+        """按锤击数和持续时间重新计算每分钟锤击数"""
+        duration = self.duration
+        self.strikes_per_minute = (self.strikes / duration) * 60 if duration > 0 else 0.0
+
+    def to_dict(self):
+        """转换为可JSON序列化的字典"""
+        record = {name: getattr(self, name) for name in self.__slots__}
+        record['duration'] = self.duration
+        for name in ('strike_times', 'strike_frequencies', 'strike_volumes'):
+            record[name] = record[name].tolist()
+        return record
+
+    @classmethod
+    def from_dict(cls, record):
+        """由to_dict()的结果还原"""
+        pile = cls(record['number'], record['name'], record['strikes'],
+                   record['start_time'], record['end_time'],
+                   record['strike_times'], record['strike_frequencies'], record['strike_volumes'])
+        for name in ('frequency_range', 'volume_range', 'strikes_per_minute',
+                     'penetration_depth', 'elevation_height', 'construction_judgment'):
+            if name in record:
+                setattr(pile, name, record[name])
+        return pile
+
+
+class StrikeDetector:
+    """锤击与桩完成检测状态机
+
+    流式接口: process_block() 逐块输入采样，适用于实时监测。
+    批量接口: process_signal() / process_features() 输入整段数据，适用于文件分析。
+    两者都返回 StrikeEvent / PileEvent 列表，状态在调用之间保持连续。
+    """
+
+    def __init__(self, sample_rate=44100, chunk_size=1024, threshold=0.3,
+                 min_frequency=80, max_frequency=2000, min_interval=0.3,
+                 silence_duration=600.0, detection_mode='fft', decimate=False):
+        if detection_mode not in DETECTION_MODES:
+            raise ValueError(f"不支持的检测模式: {detection_mode}")
+        self.detection_mode = detection_mode
+        # 批量接口先抽取到能覆盖max_frequency的最低采样率，流式接口不受影响
+        self.decimate = decimate
+        self.sample_rate = sample_rate
+        self.chunk_size = chunk_size
+        self.threshold = threshold
+        self.min_frequency = min_frequency
+        self.max_frequency = max_frequency
+        self.min_interval = min_interval
+        self.silence_duration = silence_duration
+        # 分阶段耗时统计（profiling.Profiler），为None时不计时
+        self.profiler = None
+        self.reset()
+
+    @classmethod
+    def from_config(cls, config, file_mode=False, **overrides):
+        """从config.json格式的字典创建检测器
+
+        file_mode为True时阈值乘以file_analysis_threshold_multiplier。
+        """
+        params = dict(DEFAULT_PARAMS)
+        params.update({k: float(config[k]) for k in DEFAULT_PARAMS if k in config})
+        if file_mode:
+            params['threshold'] *= float(config.get('file_analysis_threshold_multiplier', 1.0))
+        params['detection_mode'] = config.get('detection_mode', 'fft')
+        params['decimate'] = bool(config.get('analysis_decimation', False))
+        params.update(overrides)
+        return cls(**params)
+
+    def reset(self):
+        """重置全部检测状态"""
+        self.samples_seen = 0
+        self.piles_completed = 0
+        self.total_strikes = 0
+        # 最近一帧的音量，以及最近一次过阈值帧的主频率和频带能量比，供界面显示
+        self.last_volume = 0.0
+        self.last_frequency = 0.0
+        self.last_band_ratio = 0.0
+        self._bandpass = None
+        self._decimator = None
+        self._reset_pile()
+
+    def _reset_pile(self):
+        self.pile_start_time = None
+        self.last_strike_time = None
+        self.strike_times = array('d')
+        self.strike_frequencies = array('d')
+        self.strike_volumes = array('d')
+        # 当前桩锤击音量和频率的增量统计
+        self.volume_stats = RunningStats()
+        self.frequency_stats = RunningStats()
+
+    def get_state(self):
+        """可JSON序列化的状态机状态，用于断点续算（不含滤波器状态）"""
+        return {
+            'samples_seen': self.samples_seen,
+            'piles_completed': self.piles_completed,
+            'total_strikes': self.total_strikes,
+            'pile_start_time': self.pile_start_time,
+            'last_strike_time': self.last_strike_time,
+            'strike_times': self.strike_times.tolist(),
+            'strike_frequencies': self.strike_frequencies.tolist(),
+            'strike_volumes': self.strike_volumes.tolist(),
+        }
+
+    def set_state(self, state):
+        """恢复get_state()保存的状态，当前桩的增量统计按锤击顺序重新累计"""
+        self.reset()
+        self.samples_seen = int(state['samples_seen'])
+        self.piles_completed = int(state['piles_completed'])
+        self.total_strikes = int(state['total_strikes'])
+        self.pile_start_time = state['pile_start_time']
+        self.last_strike_time = state['last_strike_time']
+        self.strike_times = array('d', state['strike_times'])
+        self.strike_frequencies = array('d', state['strike_frequencies'])
+        self.strike_volumes = array('d', state['strike_volumes'])
+        for strike_time, frequency, volume in zip(self.strike_times, self.strike_frequencies,
+                                                  self.strike_volumes):
+            self.volume_stats.add(volume, strike_time)
+            self.frequency_stats.add(frequency)
+
+    @property
+    def current_pile_strikes(self):
+        return len(self.strike_times)
+
+    def status(self):
+        """当前状态的一致快照，其他线程读取时应持有保护检测引擎的锁"""
+        return DetectorStatus(
+            self.last_volume, self.last_frequency, self.last_band_ratio,
+            self.pile_start_time, self.last_strike_time, len(self.strike_times),
+            self.volume_stats.min, self.volume_stats.max,
+            self.frequency_stats.min, self.frequency_stats.max)
+
+    def is_valid_frequency(self, frequency):
+        """检查频率是否在有效范围内"""
+        return self.min_frequency <= frequency <= self.max_frequency
+
+    def update(self, current_time, volume, frequency):
+        """输入一帧特征，返回本帧产生的事件"""
+        events = []
+
+        # 检测桩完成
+        if (self.last_strike_time is not None and
+                (current_time - self.last_strike_time) > self.silence_duration):
+            events.append(PileEvent(current_time, self._complete_pile(self.last_strike_time)))
+
+        # 检测锤击
+        if (volume > self.threshold and
+                self.is_valid_frequency(frequency) and
+                (self.last_strike_time is None or
+                 (current_time - self.last_strike_time) > self.min_interval)):
+            events.append(self._add_strike(current_time, frequency, volume))
+
+        return events
+
+    def _add_strike(self, current_time, frequency, volume):
+        if self.pile_start_time is None:
+            self.pile_start_time = current_time
+        self.last_strike_time = current_time
+        self.strike_times.append(current_time)
+        self.strike_frequencies.append(frequency)
+        self.strike_volumes.append(volume)
+        self.volume_stats.add(volume, current_time)
+        self.frequency_stats.add(frequency)
+        self.total_strikes += 1
+        return StrikeEvent(current_time, frequency, volume,
+                           self.piles_completed + 1, len(self.strike_times),
+                           self.volume_stats.mean, self.volume_stats.std)
+
+    def _complete_pile(self, end_time):
+        self.piles_completed += 1
+        # 锤击数组直接移交给桩记录，随后_reset_pile()为下一根桩新建数组
+        pile = PileRecord(
+            self.piles_completed, f"桩{self.piles_completed}", len(self.strike_times),
+            self.pile_start_time, end_time,
+            self.strike_times, self.strike_frequencies, self.strike_volumes)
+        self._reset_pile()
+        return pile
+
+    def end_pile(self, end_time=None):
+        """强制结束当前桩，无锤击时返回None"""
+        if not self.strike_times:
+            return None
+        if end_time is None:
+            end_time = self.last_strike_time
+        return self._complete_pile(end_time)
+
+    def finish(self, end_time=None):
+        """数据结束时收尾，返回最后一根桩的事件"""
+        if end_time is None:
+            end_time = self.samples_seen / self.sample_rate
+        pile = self.end_pile(end_time)
+        return [PileEvent(end_time, pile)] if pile else []
+
+    def _bandpass_filter(self, sample_rate=None):
+        """IIR模式的带通包络滤波器，检测频段或采样率改变时重新设计"""
+        sample_rate = sample_rate or self.sample_rate
+        bandpass = self._bandpass
+        if (bandpass is None or bandpass.sample_rate != sample_rate or
+                bandpass.min_frequency != self.min_frequency or
+                bandpass.max_frequency != self.max_frequency):
+            bandpass = self._bandpass = BandpassEnvelope(
+                sample_rate, self.min_frequency, self.max_frequency)
+        return bandpass
+
+    def _get_decimator(self):
+        """批量接口的抽取器，抽取倍数随max_frequency变化时重新创建"""
+        factor = decimation_factor(self.sample_rate, self.chunk_size, self.max_frequency)
+        if self._decimator is None or self._decimator.factor != factor:
+            self._decimator = Decimator(factor)
+        return self._decimator
+
+    def process_block(self, block, timestamp=None):
+        """流式接口: 处理一个音频块"""
+        block = np.asarray(block)
+        if block.ndim > 1:
+            block = block[:, 0]
+        if timestamp is None:
+            timestamp = self.samples_seen / self.sample_rate
+        self.samples_seen += len(block)
+        if len(block) == 0:
+            return []
+        profiler = self.profiler
+        start = perf_counter() if profiler else 0.0
+        if self.detection_mode == 'iir':
+            return self._process_block_iir(block, timestamp, profiler, start)
+        self.last_volume = volume = compute_volume(block)
+        if profiler:
+            start = profiler.record('rms', start)
+        if volume > self.threshold:
+            spectral = get_extractor(self.sample_rate, len(block)).analyze(
+                block, self.min_frequency, self.max_frequency)
+            self.last_frequency = frequency = spectral.frequency
+            self.last_band_ratio = band_ratio(spectral.in_band, spectral.out_band)
+            if profiler:
+                start = profiler.record('fft', start)
+        else:
+            # 音量未过阈值时不可能计为锤击，跳过FFT；界面显示保留上次的主频率和频带能量比
+            frequency = 0.0
+        events = self.update(timestamp, volume, frequency)
+        if profiler:
+            profiler.record('decision', start)
+        return events
+
+    def _process_block_iir(self, block, timestamp, profiler=None, start=0.0):
+        """IIR模式: 音量取块内带通包络峰值，锤击时间精确到峰值所在采样"""
+        filtered, envelope = self._bandpass_filter().process(block)
+        if profiler:
+            start = profiler.record('bandpass', start)
+        peak = int(np.argmax(envelope))
+        self.last_volume = volume = float(envelope[peak])
+        energy = float(np.dot(block, block))
+        self.last_band_ratio = float(np.dot(filtered, filtered)) / energy if energy > 0 else 0.0
+        if volume > self.threshold:
+            self.last_frequency = frequency = float(
+                zero_crossing_frequency(filtered, self.sample_rate)[0])
+        else:
+            frequency = 0.0
+        if profiler:
+            start = profiler.record('zero_crossing', start)
+        events = self.update(timestamp + peak / self.sample_rate, volume, frequency)
+        if profiler:
+            profiler.record('decision', start)
+        return events
+
+    def process_features(self, times, volumes, frequencies):
+        """批量接口: 对预先计算的逐帧特征运行状态机
+
+        结果与逐帧调用update()完全一致，但只在候选帧（音量和频率都满足条件）
+        上执行Python逻辑，桩完成时间通过二分查找确定。
+        """
+        times = np.asarray(times, dtype=np.float64)
+        volumes = np.asarray(volumes)
+        frequencies = np.asarray(frequencies)
+        candidates = np.flatnonzero((volumes > self.threshold) &
+                                    (frequencies >= self.min_frequency) &
+                                    (frequencies <= self.max_frequency))
+        events = []
+        for k in candidates:
+            current_time = float(times[k])
+            if (self.last_strike_time is not None and
+                    (current_time - self.last_strike_time) > self.silence_duration):
+                events.append(self._complete_pile_event(times))
+            if (self.last_strike_time is None or
+                    (current_time - self.last_strike_time) > self.min_interval):
+                events.append(self._add_strike(current_time, float(frequencies[k]), float(volumes[k])))
+
+        # 最后一次锤击之后的静默
+        if (len(times) and self.last_strike_time is not None and
+                (float(times[-1]) - self.last_strike_time) > self.silence_duration):
+            events.append(self._complete_pile_event(times))
+        return events
+
+    def _complete_pile_event(self, times):
+        """按静默条件结束当前桩，事件时间为第一个超过静默时长的帧"""
+        last = self.last_strike_time
+        j = int(np.searchsorted(times, last + self.silence_duration, side='right'))
+        # 修正浮点误差，保持与update()相同的判定式
+        while j > 0 and (times[j - 1] - last) > self.silence_duration:
+            j -= 1
+        while j < len(times) and (times[j] - last) <= self.silence_duration:
+            j += 1
+        return PileEvent(float(times[min(j, len(times) - 1)]), self._complete_pile(last))
+
+    def extract_features(self, audio_data, start_sample=0, batch_frames=4096, band_edges=None,
+                         volume_gate=None):
+        """按chunk_size分帧计算每帧的时间、音量和主频率
+
+        整帧部分用跨步视图分批向量化计算，末尾不足一帧的部分单独计算。
+        给出band_edges时额外返回各频带能量。
+        给出volume_gate时只对音量超过该值的帧做FFT，其余帧的主频率和频带能量为0。
+        decimate为True时先抽取再分帧，抽取器状态在连续调用之间保持，帧时间仍按原始采样计算。
+        FFT模式下音量仍按原始采样计算（抽取会滤掉频段外噪声，安静帧的RMS明显变小），
+        阈值含义与不抽取时相同。
+        """
+        audio_data = original = np.asarray(audio_data)
+        profiler = self.profiler
+        rate, size, factor, delay = self.sample_rate, self.chunk_size, 1, 0.0
+        if self.decimate:
+            if profiler:
+                start = perf_counter()
+            decimator = self._get_decimator()
+            if decimator.factor > 1:
+                factor, delay = decimator.factor, decimator.delay
+                audio_data = decimator.process(audio_data)
+                rate, size = self.sample_rate / factor, self.chunk_size // factor
+            if profiler:
+                profiler.record('decimate', start)
+        if self.detection_mode == 'iir':
+            return self._extract_features_iir(audio_data, start_sample, rate, size, factor, delay,
+                                              batch_frames, band_edges, volume_gate)
+        frames = frame_signal(audio_data, size)
+        n_full = len(frames)
+        n_frames = n_full + (1 if len(audio_data) > n_full * size else 0)
+
+        volumes = np.empty(n_frames)
+        frequencies = np.empty(n_frames)
+        bands = np.empty((n_frames, len(band_edges))) if band_edges is not None else None
+        if factor > 1:
+            if profiler:
+                start = perf_counter()
+            full_rate = frame_signal(original, self.chunk_size)
+            for i in range(0, len(full_rate), batch_frames):
+                batch = full_rate[i:i + batch_frames]
+                volumes[i:i + len(batch)] = frame_volumes(batch)
+            if len(original) > len(full_rate) * self.chunk_size:
+                volumes[-1] = compute_volume(original[len(full_rate) * self.chunk_size:])
+            if profiler:
+                profiler.record('rms', start)
+        extractor = get_extractor(rate, size)
+        for i in range(0, n_full, batch_frames):
+            if profiler:
+                start = perf_counter()
+            batch = frames[i:i + batch_frames]
+            if factor == 1:
+                volumes[i:i + len(batch)] = frame_volumes(batch)
+            batch_volumes = volumes[i:i + len(batch)]
+            if profiler:
+                start = profiler.record('rms', start)
+            if volume_gate is None:
+                spectral = extractor.analyze(batch, band_edges=band_edges)
+                frequencies[i:i + len(batch)] = spectral.frequency
+                if bands is not None:
+                    bands[i:i + len(batch)] = spectral.bands
+                if profiler:
+                    profiler.record('fft', start)
+                continue
+            # 级联判定: 先用音量筛选，只对可能成为锤击的帧做FFT
+            loud = np.flatnonzero(batch_volumes > volume_gate)
+            frequencies[i:i + len(batch)] = 0.0
+            if bands is not None:
+                bands[i:i + len(batch)] = 0.0
+            if len(loud):
+                spectral = extractor.analyze(batch[loud], band_edges=band_edges)
+                frequencies[i + loud] = spectral.frequency
+                if bands is not None:
+                    bands[i + loud] = spectral.bands
+            if profiler:
+                profiler.record('fft', start)
+        if n_frames > n_full:
+            tail = audio_data[n_full * size:]
+            if factor == 1:
+                volumes[-1] = compute_volume(tail)
+            frequencies[-1] = 0.0
+            if bands is not None:
+                bands[-1] = 0.0
+            if volume_gate is None or volumes[-1] > volume_gate:
+                spectral = get_extractor(rate, len(tail)).analyze(tail, band_edges=band_edges)
+                frequencies[-1] = spectral.frequency
+                if bands is not None:
+                    bands[-1] = spectral.bands
+
+        times = (start_sample + np.arange(n_frames) * self.chunk_size) / self.sample_rate
+        if bands is not None:
+            return times, volumes, frequencies, bands
+        return times, volumes, frequencies
+
+    def _extract_features_iir(self, audio_data, start_sample, rate, size, factor, delay,
+                              batch_frames, band_edges, volume_gate):
+        """IIR模式的逐帧特征: 音量为帧内带通包络峰值，帧时间为峰值所在采样
+
+        主频率由带通输出的过零点估计；频带能量仍由FFT计算。
+        滤波器状态在连续调用之间保持。audio_data为抽取后的数据，采样率为rate，
+        峰值位置换算回原始采样时扣除抽取滤波器的群延迟delay。
+        """
+        profiler = self.profiler
+        if profiler:
+            start = perf_counter()
+        filtered, envelope = self._bandpass_filter(rate).process(audio_data)
+        if profiler:
+            start = profiler.record('bandpass', start)
+        n_full = len(audio_data) // size
+        n_frames = -(-len(audio_data) // size)
+
+        # 包络非负，补零不影响峰值
+        envelope_frames = np.zeros(n_frames * size)
+        envelope_frames[:len(envelope)] = envelope
+        envelope_frames = envelope_frames.reshape(n_frames, size)
+        peaks = np.argmax(envelope_frames, axis=1)
+        volumes = envelope_frames[np.arange(n_frames), peaks]
+
+        frequencies = np.zeros(n_frames)
+        loud = np.arange(n_frames) if volume_gate is None else np.flatnonzero(volumes > volume_gate)
+        filtered_frames = frame_signal(filtered, size)
+        full = loud[loud < n_full]
+        for i in range(0, len(full), batch_frames):
+            index = full[i:i + batch_frames]
+            frequencies[index] = zero_crossing_frequency(filtered_frames[index], rate)
+        if n_frames > n_full and len(loud) and loud[-1] == n_full:
+            frequencies[-1] = zero_crossing_frequency(filtered[n_full * size:], rate)[0]
+
+        if profiler:
+            start = profiler.record('zero_crossing', start)
+        positions = start_sample + np.arange(n_frames) * self.chunk_size + peaks * factor
+        if delay:
+            positions = np.maximum(positions - delay, 0)
+        times = positions / self.sample_rate
+        if band_edges is None:
+            return times, volumes, frequencies
+
+        bands = np.zeros((n_frames, len(band_edges)))
+        frames = frame_signal(audio_data, size)
+        extractor = get_extractor(rate, size)
+        for i in range(0, n_full, batch_frames):
+            batch = frames[i:i + batch_frames]
+            bands[i:i + len(batch)] = extractor.analyze(batch, band_edges=band_edges).bands
+        if n_frames > n_full:
+            tail = audio_data[n_full * size:]
+            bands[-1] = get_extractor(rate, len(tail)).analyze(
+                tail, band_edges=band_edges).bands
+        if profiler:
+            profiler.record('fft', start)
+        return times, volumes, frequencies, bands
+
+    def process_signal(self, audio_data):
+        """批量接口: 处理一段连续音频
+
+        连续多次调用时，除最后一段外每段长度应为chunk_size的整数倍。
+        """
+        audio_data = np.asarray(audio_data)
+        times, volumes, frequencies = self.extract_features(audio_data, self.samples_seen,
+                                                            volume_gate=self.threshold)
+        self.samples_seen += len(audio_data)
+        profiler = self.profiler
+        if profiler:
+            start = perf_counter()
+        events = self.process_features(times, volumes, frequencies)
+        if profiler:
+            profiler.record('decision', start)
+        return events
+
+
+def analyze_audio(audio_data, sample_rate, **params):
+    """分析整段音频，返回完成的桩信息列表"""
+    detector = StrikeDetector(sample_rate=sample_rate, **params)
+    events = detector.process_signal(audio_data)
+    events.extend(detector.finish())
+    return [event.pile for event in events if isinstance(event, PileEvent)]
+
+
+def extract_stream_features(blocks, sample_rate, chunk_size=1024):
+    """从音频块序列提取逐帧特征 (times, volumes, frequencies)
+
+    除最后一块外，各块长度应为chunk_size的整数倍。
+    """
+    extractor = StrikeDetector(sample_rate=sample_rate, chunk_size=chunk_size)
+    parts = []
+    start_sample = 0
+    for block in blocks:
+        parts.append(extractor.extract_features(block, start_sample))
+        start_sample += len(block)
+    if not parts:
+        return np.zeros(0), np.zeros(0), np.zeros(0)
+    return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+
+def select_candidates(times, min_gap):
+    """对候选帧时间按最小间隔贪心去重，返回被计为锤击的下标"""
+    n = len(times)
+    if n == 0:
+        return np.zeros(0, dtype=int)
+    index = np.arange(n)
+    # 每个候选之后第一个满足 t - times[i] > min_gap 的候选
+    nxt = np.searchsorted(times, times + min_gap, side='right')
+    # 修正浮点误差，保持与update()相同的判定式
+    while True:
+        fix = (nxt > index + 1) & ((times[np.maximum(nxt - 1, 0)] - times) > min_gap)
+        if not fix.any():
+            break
+        nxt[fix] -= 1
+    while True:
+        fix = nxt < n
+        fix[fix] = (times[nxt[fix]] - times[fix]) <= min_gap
+        if not fix.any():
+            break
+        nxt[fix] += 1
+
+    selected = []
+    i = 0
+    while i < n:
+        selected.append(i)
+        i = nxt[i]
+    return np.array(selected, dtype=int)
+
+
+def select_strikes(times, volumes, frequencies, threshold=0.3, min_frequency=80,
+                   max_frequency=2000, min_interval=0.3, silence_duration=600.0):
+    """直接从逐帧特征计算锤击时间，结果与StrikeDetector一致
+
+    间隔超过min_interval或超过静默时长（新桩开始）的候选帧都计为锤击。
+    """
+    times = np.asarray(times, dtype=np.float64)
+    volumes = np.asarray(volumes)
+    frequencies = np.asarray(frequencies)
+    mask = ((volumes > threshold) &
+            (frequencies >= min_frequency) & (frequencies <= max_frequency))
+    candidate_times = times[mask]
+    return candidate_times[select_candidates(candidate_times, min(min_interval, silence_duration))]
+
+
+def split_piles(strike_times, silence_duration):
+    """按静默时长把锤击时间分成各桩，返回每根桩的锤击数"""
+    if len(strike_times) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(strike_times) > silence_duration) + 1
+    return np.diff(np.concatenate([[0], breaks, [len(strike_times)]])).tolist()
+
+
+def sweep_thresholds(times, volumes, frequencies, thresholds, min_frequency=80,
+                     max_frequency=2000, min_interval=0.3, silence_duration=600.0):
+    """用同一组逐帧特征计算每个阈值下的锤击总数"""
+    times = np.asarray(times, dtype=np.float64)
+    volumes = np.asarray(volumes)
+    frequencies = np.asarray(frequencies)
+    band = (frequencies >= min_frequency) & (frequencies <= max_frequency)
+    band_times = times[band]
+    band_volumes = volumes[band]
+    min_gap = min(min_interval, silence_duration)
+    return np.array([len(select_candidates(band_times[band_volumes > threshold], min_gap))
+                     for threshold in thresholds], dtype=int)
@@ -0,0 +1,334 @@
+"""逐帧特征磁盘缓存
+
+按文件内容指纹、采样率和分帧参数缓存逐帧音量、主频率和频带能量（逐块压缩npz）。
+修改阈值或频段后重新分析时直接读取缓存，不再解码和FFT。
+特征边计算边逐块写入、读取时逐块送入检测引擎，内存占用与录音长度无关。
+缓存目录总大小超过上限时按最近使用时间淘汰。
+"""
+import hashlib
+import os
+import shutil
+from time import perf_counter
+
+import numpy as np
+
+from audio_io import WavReader, open_audio
+from decimate import decimation_factor
+from detector import BAND_EDGES, StrikeDetector
+from segments import DEFAULT_SEGMENT_SECONDS, iter_segment_features, resolve_jobs, warmup_samples
+
+# 特征计算方法变化时递增，使旧缓存失效
+FEATURE_VERSION = 3
+
+DEFAULT_CACHE_DIR = "feature_cache"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+META_FILE = "meta.npz"
+TEMP_SUFFIX = ".tmp"
+
+FINGERPRINT_SAMPLES = 16
+FINGERPRINT_PIECE = 64 * 1024
+
+
+def file_fingerprint(filename):
+    """文件内容指纹
+
+    对文件大小和均匀分布的若干64KB片段做哈希，多小时录音也能在毫秒级完成。
+    """
+    size = os.path.getsize(filename)
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(filename, 'rb') as f:
+        if size <= FINGERPRINT_SAMPLES * FINGERPRINT_PIECE:
+            digest.update(f.read())
+        else:
+            step = (size - FINGERPRINT_PIECE) // (FINGERPRINT_SAMPLES - 1)
+            for i in range(FINGERPRINT_SAMPLES):
+                f.seek(i * step)
+                digest.update(f.read(FINGERPRINT_PIECE))
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    """按LRU淘汰的逐帧特征缓存，每个条目是一个目录，特征按计算时的块分文件保存"""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, filename, sample_rate, chunk_size, variant=""):
+        """缓存键: 内容指纹 + 采样率 + 分帧参数 + 特征版本，variant区分检测模式"""
+        key = f"{file_fingerprint(filename)}_{int(sample_rate)}_{int(chunk_size)}_v{FEATURE_VERSION}"
+        return f"{key}_{variant}" if variant else key
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def open(self, key):
+        """打开缓存条目，返回 (元数据, 逐块特征迭代器)，不存在或损坏时返回None
+
+        迭代器每次只读取一块，内存占用与录音长度无关。
+        """
+        path = self._path(key)
+        if not os.path.isdir(path):
+            return None
+        try:
+            with np.load(os.path.join(path, META_FILE)) as data:
+                meta = {name: data[name] for name in data.files}
+        except Exception:
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        # 更新访问时间，用于LRU淘汰
+        os.utime(path)
+        return meta, self._iter_parts(path, int(meta['n_parts']))
+
+    def _iter_parts(self, path, n_parts):
+        for index in range(n_parts):
+            try:
+                with np.load(os.path.join(path, _part_file(index))) as data:
+                    part = {name: data[name] for name in data.files}
+            except Exception:
+                shutil.rmtree(path, ignore_errors=True)
+                raise
+            yield part
+
+    def writer(self, key):
+        """逐块写入新条目，commit之后条目才可读取"""
+        return CacheWriter(self, key)
+
+    def evict(self):
+        """删除最久未使用的缓存，直到总大小不超过上限"""
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if os.path.isdir(path) and not name.endswith(TEMP_SUFFIX):
+                size = sum(entry.stat().st_size for entry in os.scandir(path))
+            elif name.endswith('.npz'):
+                # 旧版本的单文件缓存，不再读取，照常按使用时间淘汰
+                size = os.path.getsize(path)
+            else:
+                continue
+            entries.append((os.stat(path).st_mtime, size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.unlink(path)
+            total -= size
+
+    def clear(self):
+        """清空缓存"""
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                elif name.endswith('.npz'):
+                    os.unlink(path)
+
+
+class CacheWriter:
+    """缓存条目的逐块写入器，先写入临时目录，全部写完后改名为正式条目"""
+
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.path = cache._path(key)
+        self.temp_path = self.path + TEMP_SUFFIX
+        shutil.rmtree(self.temp_path, ignore_errors=True)
+        os.makedirs(self.temp_path)
+        self.n_parts = 0
+
+    def add(self, **arrays):
+        """写入一块特征"""
+        np.savez_compressed(os.path.join(self.temp_path, _part_file(self.n_parts)), **arrays)
+        self.n_parts += 1
+
+    def commit(self, **meta):
+        """写入元数据并启用条目，再按总大小上限淘汰"""
+        np.savez(os.path.join(self.temp_path, META_FILE), n_parts=self.n_parts, **meta)
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.replace(self.temp_path, self.path)
+        self.cache.evict()
+
+    def discard(self):
+        """放弃未写完的条目"""
+        shutil.rmtree(self.temp_path, ignore_errors=True)
+
+
+def _part_file(index):
+    return f"{index:05d}.npz"
+
+
+def iter_file_features(reader, chunk_size, params, jobs=1, start_sample=0, should_stop=None,
+                       profiler=None):
+    """从start_sample开始按时间顺序逐块产出 (end, (times, volumes, frequencies, bands))
+
+    jobs不为1且WAV文件长于一个分段时，各分段在jobs个进程中并行计算（0为CPU核数）。
+    start_sample应为chunk_size的整数倍；有状态的滤波器从start_sample之前预热。
+    给出profiler时记录读取/解码等待（decode）和各特征阶段的耗时，
+    并行分段只记录等待各分段结果的时间（segment）。
+    """
+    sample_rate = reader.sample_rate
+    if (resolve_jobs(jobs) > 1 and isinstance(reader, WavReader) and
+            reader.n_frames - start_sample > DEFAULT_SEGMENT_SECONDS * sample_rate):
+        segments = iter_segment_features(reader.filename, reader.n_frames, sample_rate,
+                                         chunk_size, jobs, params, BAND_EDGES,
+                                         should_stop=should_stop, start_sample=start_sample)
+        yield from _timed(segments, profiler, 'segment')
+        return
+
+    extractor = StrikeDetector(sample_rate=sample_rate, chunk_size=chunk_size, **params)
+    extractor.profiler = profiler
+    position = start_sample - warmup_samples(extractor, start_sample)
+    skip = (start_sample - position) // chunk_size
+    if isinstance(reader, WavReader):
+        blocks = reader.blocks(chunk_size * 2048, position)
+    else:
+        blocks = _skip_samples(reader.blocks(chunk_size * 2048), position)
+    for block in _timed(blocks, profiler, 'decode'):
+        if should_stop and should_stop():
+            return
+        part = extractor.extract_features(block, position, band_edges=BAND_EDGES)
+        position += len(block)
+        if skip:
+            dropped = min(skip, len(part[0]))
+            part, skip = tuple(array[dropped:] for array in part), skip - dropped
+        yield position, part
+
+
+def _timed(items, profiler, stage):
+    """逐项转发，给出profiler时记录取得每一项的等待时间"""
+    if not profiler:
+        yield from items
+        return
+    iterator = iter(items)
+    while True:
+        start = perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        profiler.record(stage, start)
+        yield item
+
+
+def _skip_samples(blocks, count):
+    """跳过不能随机读取的数据流开头的count个采样"""
+    for block in blocks:
+        if count >= len(block):
+            count -= len(block)
+            continue
+        yield block[count:]
+        count = 0
+
+
+def _cached_parts(parts, sample_rate, chunk_size, start_sample=0, should_stop=None):
+    """把缓存中的逐块特征还原为 (end, (times, volumes, frequencies, bands))，跳过start_sample之前的帧"""
+    frame = 0
+    skip = start_sample // chunk_size
+    for stored in parts:
+        if should_stop and should_stop():
+            return
+        n_frames = len(stored['volumes'])
+        if 'positions' in stored:
+            positions = stored['positions']
+        else:
+            positions = (frame + np.arange(n_frames)) * chunk_size
+        frame += n_frames
+        if skip >= n_frames:
+            skip -= n_frames
+            continue
+        part = (positions / sample_rate, stored['volumes'], stored['frequencies'],
+                stored['band_energies'])
+        if skip:
+            part, skip = tuple(array[skip:] for array in part), 0
+        yield int(stored['end']), part
+
+
+def load_features(filename, cache=None, chunk_size=1024, should_stop=None,
+                  detection_mode='fft', min_frequency=80, max_frequency=2000, decimate=False,
+                  jobs=1, start_sample=0, on_features=None, profiler=None, keep=True):
+    """读取文件的逐帧特征，优先使用缓存
+
+    返回字典: times, volumes, frequencies, band_energies, sample_rate, n_samples, cached。
+    should_stop返回True时提前结束，此时返回已计算的部分特征且不写入缓存。
+    IIR模式的特征取决于检测频段，缓存按频段分别保存；抽取后的特征按抽取倍数分别保存。
+    jobs不为1且WAV文件长于一个分段时，各分段在jobs个进程中并行计算（0为CPU核数）。
+    start_sample大于0时从该位置续算，只返回续算部分的特征且不写入缓存。
+    on_features(end, total, features)在每块特征算完或从缓存读出时调用，total为文件总采样数（未知时为None）。
+    keep为False时不保留逐帧特征（返回的特征数组为None），只由on_features逐块处理，
+    内存占用与录音长度无关。
+    profiler为profiling.Profiler时记录解码和各特征阶段的耗时。
+    """
+    variant = f"iir{min_frequency:g}-{max_frequency:g}" if detection_mode == 'iir' else ""
+    kept = [] if keep else None
+    n_samples = start_sample
+    with open_audio(filename) as reader:
+        sample_rate, total = reader.sample_rate, reader.n_frames
+        if decimate:
+            factor = decimation_factor(sample_rate, chunk_size, max_frequency)
+            if factor > 1:
+                variant += f"d{factor}"
+        key = cache.key(filename, sample_rate, chunk_size, variant) if cache else None
+        entry = cache.open(key) if key else None
+        writer = None
+        if entry is not None:
+            meta, stored = entry
+            total = int(meta['n_samples'])
+            parts = _cached_parts(stored, sample_rate, chunk_size, start_sample, should_stop)
+        else:
+            params = {
+                'min_frequency': min_frequency,
+                'max_frequency': max_frequency,
+                'detection_mode': detection_mode,
+                'decimate': decimate,
+            }
+            parts = iter_file_features(reader, chunk_size, params, jobs,
+                                       start_sample, should_stop, profiler)
+            if key and start_sample == 0:
+                writer = cache.writer(key)
+
+        try:
+            for n_samples, part in parts:
+                if writer:
+                    times, volumes, frequencies, bands = part
+                    arrays = {'end': np.array(n_samples), 'volumes': volumes,
+                              'frequencies': frequencies, 'band_energies': bands.astype(np.float32)}
+                    if detection_mode == 'iir':
+                        # IIR模式的帧时间为包络峰值所在采样，保存采样位置以精确还原
+                        arrays['positions'] = np.rint(times * sample_rate).astype(np.int64)
+                    writer.add(**arrays)
+                if kept is not None:
+                    kept.append(part)
+                if on_features:
+                    on_features(n_samples, total, part)
+            stopped = bool(should_stop and should_stop())
+        except BaseException:
+            if writer:
+                writer.discard()
+            raise
+        if writer:
+            if stopped:
+                writer.discard()
+            else:
+                writer.commit(n_samples=np.array(n_samples), band_edges=np.array(BAND_EDGES))
+        if entry is not None and not stopped:
+            n_samples = total
+
+    times = volumes = frequencies = bands = None
+    if kept:
+        times, volumes, frequencies, bands = (np.concatenate(arrays) for arrays in zip(*kept))
+    elif kept is not None:
+        times, volumes, frequencies = np.zeros(0), np.zeros(0), np.zeros(0)
+        bands = np.zeros((0, len(BAND_EDGES)))
+
+    return {
+        'times': times,
+        'volumes': volumes,
+        'frequencies': frequencies,
+        'band_energies': bands,
+        'sample_rate': sample_rate,
+        'n_samples': n_samples,
+        'cached': entry is not None,
+    }
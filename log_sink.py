@@ -0,0 +1,75 @@
+"""日志汇集
+
+任意线程都可以写入日志，消息先进入队列，由界面线程定时批量取出显示。
+界面只保留最近若干行，完整日志按大小轮转写入磁盘。
+"""
+import collections
+import logging
+import logging.handlers
+import os
+import queue
+from datetime import datetime
+
+DEFAULT_LOG_DIR = "logs"
+DEFAULT_HISTORY_LINES = 2000
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 10
+
+
+class LogSink:
+    """线程安全的有界日志"""
+
+    def __init__(self, directory=DEFAULT_LOG_DIR, history_lines=DEFAULT_HISTORY_LINES,
+                 max_bytes=DEFAULT_MAX_BYTES, backup_count=DEFAULT_BACKUP_COUNT):
+        self._queue = queue.SimpleQueue()
+        self.history = collections.deque(maxlen=history_lines)
+        self._logger = None
+        if directory:
+            try:
+                os.makedirs(directory, exist_ok=True)
+                handler = logging.handlers.RotatingFileHandler(
+                    os.path.join(directory, "monitor.log"), maxBytes=max_bytes,
+                    backupCount=backup_count, encoding='utf-8')
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                self._logger = logging.getLogger(f"pile_monitor.{id(self)}")
+                self._logger.propagate = False
+                self._logger.setLevel(logging.INFO)
+                self._logger.addHandler(handler)
+            except OSError as e:
+                print(f"日志文件创建失败: {e}")
+
+    def write(self, message):
+        """写入一条日志（任意线程）"""
+        self._queue.put(f"[{datetime.now().strftime('%H:%M:%S')}] {message}")
+
+    def drain(self):
+        """取出队列中的全部日志，写入磁盘并加入最近历史"""
+        lines = []
+        while True:
+            try:
+                lines.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if lines:
+            self.history.extend(lines)
+            if self._logger:
+                date = datetime.now().strftime('%Y-%m-%d')
+                self._logger.info("\n".join(f"{date} {line}" for line in lines))
+        return lines
+
+    @property
+    def pending(self):
+        """尚未显示的日志条数"""
+        return self._queue.qsize()
+
+    def clear(self):
+        self.history.clear()
+
+    def close(self):
+        """写出剩余日志并关闭日志文件"""
+        self.drain()
+        if self._logger:
+            for handler in list(self._logger.handlers):
+                handler.close()
+                self._logger.removeHandler(handler)
+            self._logger = None
@@ -0,0 +1,145 @@
+"""分阶段耗时统计
+
+在解码、RMS、FFT、判定、界面刷新和日志等阶段前后计时，每个阶段按对数分桶累计直方图，
+可在界面状态区显示、导出为JSON。
+
+关闭时检测引擎和界面持有的profiler为None，各计时点只多一次真值判断:
+
+    profiler = self.profiler
+    if profiler:
+        start = perf_counter()
+    ...
+    if profiler:
+        start = profiler.record('fft', start)
+"""
+import json
+import os
+import sys
+import time
+from time import perf_counter
+
+try:
+    import resource
+except ImportError:  # Windows没有resource模块，不报告峰值内存
+    resource = None
+
+# 第0桶为1微秒以下，第i桶为 [2^(i-1), 2^i) 微秒，最后一桶不设上限
+N_BUCKETS = 32
+
+
+class StageStats:
+    """单个阶段的次数、总耗时、最大耗时和对数直方图"""
+
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * N_BUCKETS
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[min(int(seconds * 1e6).bit_length(), N_BUCKETS - 1)] += 1
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, fraction):
+        """按直方图估计的分位数（秒），取所在桶的上界，不超过最大值"""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        cumulative = 0
+        for i, count in enumerate(self.buckets):
+            cumulative += count
+            if cumulative >= target:
+                return min(2 ** i * 1e-6, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.mean,
+            'max': self.max,
+            'p50': self.percentile(0.5),
+            'p90': self.percentile(0.9),
+            'p99': self.percentile(0.99),
+            # [桶上界(微秒), 次数]，只列出非空的桶
+            'histogram_us': [[2 ** i, count] for i, count in enumerate(self.buckets) if count],
+        }
+
+
+def format_seconds(seconds):
+    """耗时的简短显示: 微秒、毫秒或秒"""
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.0f}µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f}ms"
+    return f"{seconds:.2f}s"
+
+
+def peak_rss_mb():
+    """进程峰值常驻内存 (MB)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux单位为KB，macOS为字节
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def current_rss_mb():
+    """当前常驻内存 (MB)，只在Linux上可读，其他平台退回峰值"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError, IndexError):
+        return peak_rss_mb()
+
+
+class Profiler:
+    """各阶段耗时统计，可在多个线程中记录"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.stages = {}
+        self.started_at = time.time()
+
+    def add(self, stage, seconds):
+        """记录一次耗时"""
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages.setdefault(stage, StageStats())
+        stats.add(seconds)
+
+    def record(self, stage, start):
+        """记录从start（perf_counter）到现在的耗时，返回现在的时刻，便于连续计时下一阶段"""
+        now = perf_counter()
+        self.add(stage, now - start)
+        return now
+
+    def summary(self, limit=4):
+        """按总耗时排序的前几个阶段，例如 "fft 45µs/p99 120µs | rms 8µs/p99 16µs" """
+        ranked = sorted(self.stages.items(), key=lambda item: item[1].total, reverse=True)
+        return " | ".join(f"{stage} {format_seconds(stats.mean)}/p99 {format_seconds(stats.percentile(0.99))}"
+                          for stage, stats in ranked[:limit])
+
+    def to_dict(self):
+        return {
+            'started_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started_at)),
+            'elapsed': time.time() - self.started_at,
+            'stages': {stage: stats.to_dict() for stage, stats in sorted(self.stages.items())},
+        }
+
+    def export(self, filename):
+        """导出为JSON"""
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
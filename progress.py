@@ -0,0 +1,70 @@
+"""文件分析进度
+
+按已分析的采样位置和实际耗时计算进度比例、实时倍数和预计剩余时间。
+续算时只按本次实际分析的部分计算速度。
+"""
+import time
+
+
+def format_duration(seconds):
+    """把秒数格式化为 H:MM:SS 或 M:SS"""
+    seconds = int(max(seconds, 0))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+class ProgressMeter:
+    """文件分析进度: 位置、进度比例、实时倍数和剩余时间"""
+
+    def __init__(self, sample_rate, total_samples=None, start_sample=0, clock=time.monotonic):
+        self.sample_rate = sample_rate
+        self.total_samples = total_samples
+        self.start_sample = start_sample
+        self.position = start_sample
+        self._clock = clock
+        self._start_time = clock()
+
+    def update(self, position, total_samples=None):
+        """记录当前分析位置（采样数）"""
+        self.position = position
+        if total_samples:
+            self.total_samples = total_samples
+        return self
+
+    @property
+    def elapsed(self):
+        return self._clock() - self._start_time
+
+    @property
+    def fraction(self):
+        """进度比例，总长未知时为None"""
+        if not self.total_samples:
+            return None
+        return min(self.position / self.total_samples, 1.0)
+
+    @property
+    def realtime_factor(self):
+        """本次分析的音频时长与耗时之比"""
+        elapsed = self.elapsed
+        analyzed = (self.position - self.start_sample) / self.sample_rate
+        return analyzed / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        """预计剩余秒数，总长或速度未知时为None"""
+        factor = self.realtime_factor
+        if not self.total_samples or factor <= 0:
+            return None
+        return max(self.total_samples - self.position, 0) / self.sample_rate / factor
+
+    def format(self):
+        """进度文字，例如 "1:02:30/8:00:00 (13%) 350x实时 剩余 1:12" """
+        text = format_duration(self.position / self.sample_rate)
+        if self.total_samples:
+            text += f"/{format_duration(self.total_samples / self.sample_rate)} ({self.fraction:.0%})"
+        text += f" {self.realtime_factor:.0f}x实时"
+        eta = self.eta
+        if eta is not None:
+            text += f" 剩余 {format_duration(eta)}"
+        return text
@@ -0,0 +1,259 @@
+"""实时采集
+
+音频回调只把采样复制进预分配的环形缓冲区，不做任何计算也不触碰界面。
+分析线程从缓冲区按帧取数据运行检测引擎，只把锤击和桩完成事件交给界面线程。
+锤击时间由采样计数和音频流的ADC时钟换算，与界面事件队列的延迟无关；
+输入溢出、丢失的采样和从采集到计数的延迟由StreamClock统计。
+"""
+import threading
+import time
+from collections import deque
+from time import perf_counter
+
+import numpy as np
+
+from profiling import StageStats, format_seconds
+
+DEFAULT_RING_SECONDS = 5.0
+# 相邻两次回调的ADC时间间隔比块时长多出这么多块以上时，认为中间有采样丢失。
+# 只比较相邻回调，声卡与主机时钟的漂移（百万分之几十到几百）不会累积成误报
+GAP_TOLERANCE_BLOCKS = 4
+
+
+class RingBuffer:
+    """单生产者单消费者的无锁环形缓冲区
+
+    写位置只由音频回调修改，读位置只由分析线程修改，两者都是单调递增的采样计数，
+    先写数据再更新写位置，因此不需要加锁。缓冲区满时丢弃新数据并计数。
+
+    丢弃或丢失采样后，缓冲区位置与音频流的采样序号不再相等，
+    写入端在_marks中记录 (写位置, 序号偏移)，读取端据此给出每帧首个采样的流序号last_index。
+    """
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._data = np.zeros(self.capacity, dtype=np.float32)
+        self.write_pos = 0
+        self.read_pos = 0
+        self.dropped = 0
+        self.dropped_blocks = 0
+        self.last_index = 0
+        self._write_offset = 0
+        self._read_offset = 0
+        self._marks = deque()
+
+    @property
+    def available(self):
+        """可读取的采样数"""
+        return self.write_pos - self.read_pos
+
+    def write(self, samples, skipped=0):
+        """写入采样（音频回调中调用），skipped为本块之前音频流丢失的采样数"""
+        n = len(samples)
+        if skipped:
+            self._shift(skipped)
+        if self.capacity - (self.write_pos - self.read_pos) < n:
+            self.dropped += n
+            self.dropped_blocks += 1
+            self._shift(n)
+            return False
+        start = self.write_pos % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        if first < n:
+            self._data[:n - first] = samples[first:]
+        self.write_pos += n
+        return True
+
+    def _shift(self, n):
+        """此后写入的采样的流序号比缓冲区位置多n"""
+        self._write_offset += n
+        self._marks.append((self.write_pos, self._write_offset))
+
+    def read(self, n):
+        """读取n个采样，数据不足时返回None（分析线程中调用）"""
+        if self.write_pos - self.read_pos < n:
+            return None
+        marks = self._marks
+        while marks and marks[0][0] <= self.read_pos:
+            self._read_offset = marks.popleft()[1]
+        self.last_index = self.read_pos + self._read_offset
+        start = self.read_pos % self.capacity
+        first = min(n, self.capacity - start)
+        if first == n:
+            block = self._data[start:start + n].copy()
+        else:
+            block = np.concatenate((self._data[start:], self._data[:n - first]))
+        self.read_pos += n
+        return block
+
+    def clear(self):
+        self.read_pos = self.write_pos
+        marks = self._marks
+        while marks and marks[0][0] <= self.read_pos:
+            self._read_offset = marks.popleft()[1]
+
+
+class StreamClock:
+    """音频流时钟和采集统计
+
+    第一个回调时用inputBufferAdcTime把流序号0对应到墙上时间，之后第n个采样的时间为
+    origin + n / sample_rate，不受分析线程和界面线程排队的影响。
+
+    驱动报告的input_overflow是确定的溢出信号。ADC时间只作辅助检查: 与上一次回调相比
+    晚出几块以上时把多出的时长计为丢失的采样，序号随之跳过；倒退几块以上时只计数
+    （时钟重置），每次回调都以本次ADC时间为新的比较基准。drift_ppm为声卡时钟相对
+    标称采样率的偏差估计，仅用于诊断。
+    某些声卡驱动不提供ADC时间（为0），此时以回调到达时刻为准，只能依靠溢出标志。
+    """
+
+    def __init__(self, sample_rate, wall_clock=time.time):
+        self.sample_rate = sample_rate
+        self._wall_clock = wall_clock
+        self.origin = None          # 流序号0对应的墙上时间
+        self._adc_origin = None     # 流序号0对应的ADC时间，驱动不提供时为None
+        self._last_adc = None       # 上一次回调的ADC时间和块长
+        self._last_frames = 0
+        self.samples = 0            # 已经过的流采样数（含丢失的）
+        self.callbacks = 0
+        self.overflows = 0          # 驱动报告的输入溢出次数
+        self.gaps = 0               # 由ADC时间发现的采样丢失次数
+        self.lost_samples = 0
+        self.clock_jumps = 0        # ADC时间倒退的次数
+        self.latency = StageStats()  # 从采集到界面计数的延迟
+
+    def start(self):
+        """开始监测，收到第一个回调前以当前时间作为起点"""
+        self.origin = self._wall_clock()
+
+    def on_callback(self, frames, time_info=None, status=None):
+        """音频回调中调用，返回本块之前丢失的采样数"""
+        self.callbacks += 1
+        if status is not None and status.input_overflow:
+            self.overflows += 1
+        adc_time = getattr(time_info, 'inputBufferAdcTime', 0.0) or 0.0
+        skipped = 0
+        if self.callbacks == 1:
+            current_time = getattr(time_info, 'currentTime', 0.0) or 0.0
+            if adc_time > 0 and current_time >= adc_time:
+                self._adc_origin = adc_time
+                self.origin = self._wall_clock() - (current_time - adc_time)
+            else:
+                self.origin = self._wall_clock() - frames / self.sample_rate
+        elif self._last_adc is not None and adc_time > 0:
+            excess = adc_time - self._last_adc - self._last_frames / self.sample_rate
+            tolerance = GAP_TOLERANCE_BLOCKS * frames / self.sample_rate
+            if excess > tolerance:
+                skipped = int(round(excess * self.sample_rate))
+                self.gaps += 1
+                self.lost_samples += skipped
+            elif excess < -tolerance:
+                self.clock_jumps += 1
+                # 时钟重置后按已估计的漂移把本块重新作为基准
+                drift = self.drift_ppm * 1e-6
+                self._adc_origin = adc_time - self.samples / self.sample_rate * (1 + drift)
+        if self._adc_origin is not None and adc_time > 0:
+            self._last_adc = adc_time
+            self._last_frames = frames
+        self.samples += skipped + frames
+        return skipped
+
+    @property
+    def drift_ppm(self):
+        """声卡时钟相对标称采样率的偏差（百万分之一），数据不足时为0"""
+        if self._last_adc is None or self._adc_origin is None:
+            return 0.0
+        nominal = (self.samples - self._last_frames) / self.sample_rate
+        if nominal <= 0:
+            return 0.0
+        return ((self._last_adc - self._adc_origin) / nominal - 1) * 1e6
+
+    def time_of(self, index):
+        """流序号index的采样对应的墙上时间"""
+        if self.origin is None:
+            self.start()
+        return self.origin + index / self.sample_rate
+
+    def record_latency(self, event_time, now=None):
+        """记录从采集（事件时间）到计数完成的延迟"""
+        now = self._wall_clock() if now is None else now
+        self.latency.add(max(now - event_time, 0.0))
+
+    def summary(self):
+        """状态区显示的简短统计"""
+        text = f"溢出{self.overflows} 丢失{self.gaps}次"
+        if self.latency.count:
+            text += (f" 延迟 {format_seconds(self.latency.percentile(0.5))}"
+                     f"/p99 {format_seconds(self.latency.percentile(0.99))}")
+        return text
+
+    def to_dict(self):
+        return {
+            'callbacks': self.callbacks,
+            'samples': self.samples,
+            'overflows': self.overflows,
+            'gaps': self.gaps,
+            'lost_samples': self.lost_samples,
+            'clock_jumps': self.clock_jumps,
+            'drift_ppm': self.drift_ppm,
+            'latency': self.latency.to_dict(),
+        }
+
+
+class AnalysisWorker:
+    """实时分析线程
+
+    从环形缓冲区逐帧读取数据送入检测引擎，事件通过post_events回调交给界面线程。
+    post_events在分析线程中调用，不能等待界面线程（例如只放入队列），否则界面线程stop()时会死锁。
+    检测引擎的状态由lock保护，界面线程手动结束桩时需持有同一把锁。
+    每帧的时间由clock按该帧首个采样的流序号换算。
+    """
+
+    def __init__(self, detector, ring, post_events, get_params=None, lock=None,
+                 poll_interval=None, clock=None):
+        self.detector = detector
+        self.ring = ring
+        self.post_events = post_events
+        self.get_params = get_params
+        self.lock = lock or threading.Lock()
+        self.clock = clock or StreamClock(detector.sample_rate)
+        # 没有数据时按半帧时长等待
+        self.poll_interval = poll_interval or detector.chunk_size / detector.sample_rate / 2
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self.clock.origin is None:
+            self.clock.start()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        detector = self.detector
+        chunk_size = detector.chunk_size
+        while self._running:
+            block = self.ring.read(chunk_size)
+            if block is None:
+                time.sleep(self.poll_interval)
+                continue
+
+            with self.lock:
+                # 参数可能在监测过程中被调整
+                if self.get_params:
+                    for name, value in self.get_params().items():
+                        setattr(detector, name, value)
+                timestamp = self.clock.time_of(self.ring.last_index)
+                profiler = detector.profiler
+                start = perf_counter() if profiler else 0.0
+                events = detector.process_block(block, timestamp)
+                if profiler:
+                    profiler.record('block', start)
+            if events:
+                self.post_events(events)
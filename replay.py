@@ -0,0 +1,119 @@
+"""录音回放
+
+把录音按声卡回调的方式逐块送入实时监测链路（音频回调 → 环形缓冲区 → 分析线程 → 界面），
+不需要声卡，可以尽快回放或按N倍速回放，用于复现现场问题和测量实时链路的吞吐量。
+回放时所有"当前时间"都取自ReplayClock，即录音开始时刻加已回放的时长，
+结果与回放速度和机器快慢无关。
+"""
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from audio_io import open_audio
+
+# 与sounddevice回调参数中用到的字段相同
+ReplayTimeInfo = namedtuple('ReplayTimeInfo', ['inputBufferAdcTime', 'currentTime'])
+ReplayStatus = namedtuple('ReplayStatus', ['input_overflow'])
+NO_OVERFLOW = ReplayStatus(False)
+
+# 尽快回放时环形缓冲区空间不足的等待间隔（秒）
+READY_POLL_INTERVAL = 0.001
+
+
+class ReplayClock:
+    """回放时钟: 起始时间加已回放的采样时长，可作为time.time的替代"""
+
+    def __init__(self, sample_rate, start=None):
+        self.sample_rate = sample_rate
+        self.start = time.time() if start is None else start
+        self.position = 0
+
+    def advance(self, frames):
+        self.position += frames
+
+    @property
+    def stream_time(self):
+        """已回放的时长（秒），相当于音频流时钟"""
+        return self.position / self.sample_rate
+
+    def __call__(self):
+        return self.start + self.position / self.sample_rate
+
+
+class ReplayStream:
+    """替代sounddevice.InputStream的录音回放流
+
+    callback的参数与sounddevice相同: (indata, frames, time_info, status)，indata形状为 (frames, 1)。
+    source为录音文件名，或有sample_rate和blocks(block_size)的音频源（如合成录音）。
+    speed为回放倍速，0表示尽快回放；尽快回放时每块之前等待ready()为真，
+    避免分析线程跟不上而丢块。回放结束后在回放线程中调用on_finished()。
+    """
+
+    def __init__(self, source, blocksize, callback, speed=0.0, clock=None, ready=None,
+                 on_finished=None):
+        self.reader = open_audio(source) if isinstance(source, str) else source
+        self.samplerate = self.reader.sample_rate
+        self.blocksize = blocksize
+        self.callback = callback
+        self.speed = speed
+        self.clock = clock or ReplayClock(self.samplerate)
+        self.ready = ready
+        self.on_finished = on_finished
+        self._running = False
+        self._thread = None
+
+    @property
+    def active(self):
+        return self._running
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def close(self):
+        self.stop()
+        close = getattr(self.reader, 'close', None)
+        if close:
+            close()
+
+    def _frames(self):
+        """按blocksize切分的音频块"""
+        blocksize = self.blocksize
+        for block in self.reader.blocks(blocksize * 64):
+            for start in range(0, len(block), blocksize):
+                yield block[start:start + blocksize]
+
+    def _run(self):
+        clock, rate = self.clock, self.samplerate
+        wall_start = time.monotonic()
+        try:
+            for frames in self._frames():
+                if not self._running:
+                    return
+                if self.speed > 0:
+                    # 按倍速等到本块"采集完成"的时刻
+                    delay = (clock.position + len(frames)) / rate / self.speed - (time.monotonic() - wall_start)
+                    if delay > 0:
+                        time.sleep(delay)
+                elif self.ready:
+                    while self._running and not self.ready():
+                        time.sleep(READY_POLL_INTERVAL)
+                adc_time = clock.stream_time
+                clock.advance(len(frames))
+                time_info = ReplayTimeInfo(adc_time, clock.stream_time)
+                self.callback(frames.reshape(-1, 1).astype(np.float32, copy=False), len(frames),
+                              time_info, NO_OVERFLOW)
+        finally:
+            finished = self._running
+            self._running = False
+            if finished and self.on_finished:
+                self.on_finished()
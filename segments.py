@@ -0,0 +1,112 @@
+"""单个长录音的分段并行分析
+
+把录音按chunk_size对齐切成若干段，各段的逐帧特征在进程池中并行计算，
+再按时间顺序交给同一个检测引擎的process_features()。
+锤击去重和分桩仍在一个状态机里顺序完成，结果与顺序分析一致。
+
+FFT模式的逐帧特征只依赖帧内采样，分段结果逐位相同；
+IIR模式和抽取的滤波器有状态，每段先多读WARMUP_SECONDS预热，预热部分的帧丢弃。
+只支持可以随机读取的WAV文件。
+"""
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from audio_io import WavReader
+from detector import StrikeDetector
+
+DEFAULT_SEGMENT_SECONDS = 600.0
+WARMUP_SECONDS = 1.0
+
+
+def plan_segments(n_samples, sample_rate, chunk_size, segment_seconds=DEFAULT_SEGMENT_SECONDS,
+                  start_sample=0):
+    """从start_sample开始按chunk_size对齐的分段 [(start, end), ...]，最后一段包含不足一帧的尾部"""
+    segment = max(1, int(segment_seconds * sample_rate) // chunk_size) * chunk_size
+    return [(start, min(start + segment, n_samples))
+            for start in range(start_sample, n_samples, segment)]
+
+
+def warmup_samples(extractor, start, warmup_seconds=WARMUP_SECONDS):
+    """从start开始计算特征前需要多读的预热采样数（整帧），无状态的特征不需要预热"""
+    if extractor.detection_mode != 'iir' and not extractor.decimate:
+        return 0
+    warmup = int(warmup_seconds * extractor.sample_rate) // extractor.chunk_size
+    return min(start, warmup * extractor.chunk_size)
+
+
+def resolve_jobs(jobs):
+    """并行进程数，0或None表示CPU核数"""
+    return jobs if jobs and jobs > 0 else (os.cpu_count() or 1)
+
+
+def extract_segment(filename, start, end, chunk_size=1024, params=None, band_edges=None,
+                    volume_gate=None, warmup_seconds=WARMUP_SECONDS):
+    """计算 [start, end) 采样区间的逐帧特征（在工作进程中运行）"""
+    with WavReader(filename) as reader:
+        sample_rate = reader.sample_rate
+        extractor = StrikeDetector(sample_rate=sample_rate, chunk_size=chunk_size, **(params or {}))
+        warmup = warmup_samples(extractor, start, warmup_seconds)
+        position = start - warmup
+        parts = []
+        for block in reader.blocks(chunk_size * 2048, position, end):
+            parts.append(extractor.extract_features(block, position, band_edges=band_edges,
+                                                    volume_gate=volume_gate))
+            position += len(block)
+    if not parts:
+        return None
+    features = [np.concatenate(arrays) for arrays in zip(*parts)]
+    skip = warmup // chunk_size
+    return tuple(array[skip:] for array in features)
+
+
+def iter_segment_features(filename, n_samples, sample_rate, chunk_size=1024, jobs=None,
+                          params=None, band_edges=None, volume_gate=None,
+                          segment_seconds=DEFAULT_SEGMENT_SECONDS, should_stop=None,
+                          start_sample=0):
+    """从start_sample开始按时间顺序逐段产出 (end, features)，各段在进程池中并行计算
+
+    should_stop返回True时取消未开始的分段并结束。
+    """
+    segments = plan_segments(n_samples, sample_rate, chunk_size, segment_seconds, start_sample)
+    # 界面中从工作线程调用，进程里还有Tk、音频和日志线程，fork可能复制被持有的锁，统一用spawn
+    pool = ProcessPoolExecutor(max_workers=min(resolve_jobs(jobs), len(segments) or 1),
+                               mp_context=multiprocessing.get_context('spawn'))
+    try:
+        futures = [pool.submit(extract_segment, filename, start, end, chunk_size, params,
+                               band_edges, volume_gate)
+                   for start, end in segments]
+        for (_, end), future in zip(segments, futures):
+            if should_stop and should_stop():
+                return
+            features = future.result()
+            if features is not None:
+                yield end, features
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def analyze_file_segments(filename, detector, jobs=None, segment_seconds=DEFAULT_SEGMENT_SECONDS,
+                          should_stop=None):
+    """分段并行分析WAV文件，逐段把特征交给detector，返回 (事件列表, 总采样数)
+
+    不调用finish()，由调用方处理最后一根桩。
+    """
+    with WavReader(filename) as reader:
+        n_samples = reader.n_frames
+    params = {
+        'min_frequency': detector.min_frequency,
+        'max_frequency': detector.max_frequency,
+        'detection_mode': detector.detection_mode,
+        'decimate': detector.decimate,
+    }
+    events = []
+    for end, (times, volumes, frequencies) in iter_segment_features(
+            filename, n_samples, detector.sample_rate, detector.chunk_size, jobs, params,
+            volume_gate=detector.threshold, segment_seconds=segment_seconds,
+            should_stop=should_stop):
+        events.extend(detector.process_features(times, volumes, frequencies))
+        detector.samples_seen = end
+    return events, n_samples
@@ -0,0 +1,276 @@
+"""长时间浸泡测试
+
+用合成录音或录音文件高速回放一整个班次（默认12小时）的实时监测，按模拟时间定期记录
+常驻内存、对象数、训练数据/桩记录/日志行数、线程数、每帧处理耗时、采集到计数的延迟
+和界面线程待处理的事件数，结束时检查增长是否超出预算，超出时返回1。
+
+用法:
+    python soak.py                                   # 界面模式，12小时合成录音
+    python soak.py --hours 24 -o soak.json
+    python soak.py --file 现场录音.wav --speed 60
+    python soak.py --headless --hours 1              # 无显示器时只测实时链路
+
+界面模式驱动完整的PileDrivingMonitorGUI（窗口隐藏），录音经ReplayStream进入与声卡相同的
+音频回调；无界面模式只运行音频回调、环形缓冲区、分析线程和日志汇集。
+延迟按回放时钟计算，尽快回放时反映的是界面线程落后的回放时长，按1倍速回放才等于实际延迟。
+"""
+import argparse
+import gc
+import json
+import queue
+import sys
+import threading
+import time
+
+from benchmark import BENCHMARK_PARAMS
+from detector import PileEvent, StrikeDetector
+from log_sink import LogSink
+from profiling import Profiler, StageStats, current_rss_mb, format_seconds
+from realtime import AnalysisWorker, RingBuffer, StreamClock, DEFAULT_RING_SECONDS
+from replay import ReplayStream
+from synthetic import SyntheticRecording, SyntheticSpec
+
+DEFAULT_HOURS = 12.0
+DEFAULT_SAMPLE_INTERVAL = 600.0  # 记录间隔（模拟秒）
+# 开头这一段时间内的增长不计入（模块加载、缓存和缓冲区预热）
+DEFAULT_WARMUP = 0.1
+
+# 增长预算: 预热后到结束时的增长量，以及每帧处理耗时末段与首段之比
+DEFAULT_BUDGET = {
+    'rss_growth_mb': 50.0,
+    'object_growth': 200000,
+    'block_p99_ratio': 2.0,
+    'queue_depth': 200,
+    'log_lines': 5000,
+}
+
+HEADLESS_CHUNK_SIZE = 1024
+HEADLESS_POLL_INTERVAL = 0.05
+
+
+def _window_stats(profiler, stage):
+    """取出上一记录间隔内某阶段的统计并清零"""
+    stats = profiler.stages.pop(stage, None)
+    return stats or StageStats()
+
+
+def _sample(sim_time, profiler, latency, **counts):
+    """一次记录: 内存、对象数、本间隔每帧处理耗时和延迟，以及调用方给出的计数"""
+    block = _window_stats(profiler, 'block')
+    return dict({
+        'sim_hours': sim_time / 3600.0,
+        'wall_time': time.monotonic(),
+        'rss_mb': current_rss_mb(),
+        'objects': len(gc.get_objects()),
+        'threads': threading.active_count(),
+        'blocks': block.count,
+        'block_mean_us': block.mean * 1e6,
+        'block_p99_us': block.percentile(0.99) * 1e6,
+        'latency_p99_ms': latency.percentile(0.99) * 1e3,
+    }, **counts)
+
+
+def format_sample(sample):
+    return (f"{sample['sim_hours']:6.2f}h  内存{sample['rss_mb']:7.1f}MB  对象{sample['objects']:>8}  "
+            f"每帧{format_seconds(sample['block_mean_us'] / 1e6)}/p99 {format_seconds(sample['block_p99_us'] / 1e6)}  "
+            f"延迟p99 {sample['latency_p99_ms']:.0f}ms  事件队列{sample['queue_depth']}  "
+            f"锤击{sample['strikes']} 桩{sample['piles']}")
+
+
+def check_budget(samples, budget, warmup=DEFAULT_WARMUP):
+    """检查预热后的增长，返回超出预算的说明列表"""
+    if len(samples) < 2:
+        return []
+    total = samples[-1]['sim_hours']
+    steady = [s for s in samples if s['sim_hours'] >= total * warmup] or samples[-1:]
+    first, last = steady[0], samples[-1]
+    violations = []
+
+    rss_growth = last['rss_mb'] - first['rss_mb']
+    if rss_growth > budget['rss_growth_mb']:
+        violations.append(f"内存增长 {rss_growth:.1f}MB > {budget['rss_growth_mb']:g}MB")
+
+    object_growth = last['objects'] - first['objects']
+    if object_growth > budget['object_growth']:
+        violations.append(f"对象数增长 {object_growth} > {budget['object_growth']}")
+
+    # 首末各取十分之一的记录间隔比较每帧处理耗时，避免单次抖动
+    timed = [s for s in steady if s['blocks']]
+    window = max(len(timed) // 10, 1)
+    if len(timed) >= 2 * window:
+        head = sum(s['block_p99_us'] for s in timed[:window]) / window
+        tail = sum(s['block_p99_us'] for s in timed[-window:]) / window
+        if head > 0 and tail / head > budget['block_p99_ratio']:
+            violations.append(f"每帧处理耗时p99 {head:.0f}µs -> {tail:.0f}µs "
+                              f"(>{budget['block_p99_ratio']:g}倍)")
+
+    depth = max(s['queue_depth'] for s in samples)
+    if depth > budget['queue_depth']:
+        violations.append(f"事件队列最大深度 {depth} > {budget['queue_depth']}")
+
+    log_lines = max(s['log_lines'] for s in samples)
+    if log_lines > budget['log_lines']:
+        violations.append(f"界面日志行数 {log_lines} > {budget['log_lines']}")
+    return violations
+
+
+def run_gui(source, speed, sample_interval, log=print):
+    """驱动完整界面回放，返回记录列表"""
+    import tkinter as tk
+    from main import PileDrivingMonitorGUI
+
+    root = tk.Tk()
+    root.withdraw()
+    app = PileDrivingMonitorGUI(root)
+    app.profiler = Profiler()
+    app.start_monitoring(replay_file=source, replay_speed=speed)
+    if not app.is_monitoring:
+        root.destroy()
+        raise Exception("回放启动失败，详见日志")
+    clock = app.clock
+    samples = []
+    next_sample = [0.0]
+
+    def record():
+        stream_clock = app.stream_clock
+        latency, stream_clock.latency = stream_clock.latency, StageStats()
+        sample = _sample(
+            clock.stream_time, app.profiler, latency,
+            # 检测事件经事件队列、后台线程的界面调用经ui_calls交给界面线程
+            queue_depth=(len(root.tk.splitlist(root.tk.call('after', 'info'))) +
+                         app.event_queue.qsize() + app.ui_calls.qsize()),
+            strikes=sum(pile.strikes for pile in app.pile_details) + app.detector.current_pile_strikes,
+            piles=len(app.pile_details),
+            training_data=len(app.training_data),
+            pile_details=len(app.pile_details),
+            log_lines=int(app.log_text.index('end-1c').split('.')[0]) - 1,
+            log_pending=app.log_sink.pending,
+        )
+        samples.append(sample)
+        log(format_sample(sample))
+
+    def poll():
+        if not app.is_monitoring:
+            record()
+            root.quit()
+            return
+        if clock.stream_time >= next_sample[0]:
+            record()
+            next_sample[0] += sample_interval
+        root.after(200, poll)
+
+    root.after(200, poll)
+    root.mainloop()
+    app.log_sink.close()
+    root.destroy()
+    return samples
+
+
+def run_headless(source, speed, sample_interval, params=None, log=print):
+    """不启动界面，只运行实时链路，返回记录列表（检测参数默认与合成录音配套）"""
+    finished = threading.Event()
+    stream = ReplayStream(source, HEADLESS_CHUNK_SIZE, None, speed=speed, on_finished=finished.set)
+    ring = RingBuffer(int(stream.samplerate * DEFAULT_RING_SECONDS))
+    stream_clock = StreamClock(stream.samplerate, wall_clock=stream.clock)
+    detector = StrikeDetector(sample_rate=stream.samplerate, chunk_size=HEADLESS_CHUNK_SIZE,
+                              **(params or BENCHMARK_PARAMS))
+    profiler = detector.profiler = Profiler()
+    events = queue.SimpleQueue()
+    worker = AnalysisWorker(detector, ring, events.put, clock=stream_clock)
+    log_sink = LogSink(directory=None)
+
+    def callback(indata, frames, time_info, status):
+        ring.write(indata[:, 0], stream_clock.on_callback(frames, time_info, status))
+
+    stream.callback = callback
+    stream.ready = lambda: ring.capacity - ring.available >= 2 * HEADLESS_CHUNK_SIZE
+    samples = []
+    strikes = piles = max_depth = 0
+    next_sample = 0.0
+    worker.start()
+    stream.start()
+    try:
+        while True:
+            done = finished.is_set() and ring.available < HEADLESS_CHUNK_SIZE
+            if done:
+                worker.stop()
+            max_depth = max(max_depth, events.qsize())
+            while True:
+                try:
+                    batch = events.get_nowait()
+                except queue.Empty:
+                    break
+                for event in batch:
+                    if isinstance(event, PileEvent):
+                        piles += 1
+                        log_sink.write(f"✅ 桩{piles}完成: {event.pile.strikes}次")
+                    else:
+                        strikes += 1
+                        stream_clock.record_latency(event.time)
+            log_sink.drain()
+            if done or stream.clock.stream_time >= next_sample:
+                latency, stream_clock.latency = stream_clock.latency, StageStats()
+                sample = _sample(stream.clock.stream_time, profiler, latency,
+                                 queue_depth=max_depth, strikes=strikes, piles=piles,
+                                 log_lines=len(log_sink.history), log_pending=log_sink.pending)
+                samples.append(sample)
+                log(format_sample(sample))
+                next_sample += sample_interval
+                max_depth = 0
+            if done:
+                return samples
+            time.sleep(HEADLESS_POLL_INTERVAL)
+    finally:
+        worker.stop()
+        stream.close()
+        log_sink.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="打桩锤击计数 - 长时间浸泡测试")
+    parser.add_argument('--hours', type=float, default=DEFAULT_HOURS, help="合成录音时长（小时）")
+    parser.add_argument('--file', help="回放录音文件（代替合成录音）")
+    parser.add_argument('--speed', type=float, default=0.0, help="回放倍速，0为尽快回放")
+    parser.add_argument('--seed', type=int, default=0, help="合成录音随机种子")
+    parser.add_argument('--sample-interval', type=float, default=DEFAULT_SAMPLE_INTERVAL,
+                        help="记录间隔（模拟秒）")
+    parser.add_argument('--headless', action='store_true', help="不启动界面，只测实时链路")
+    parser.add_argument('--budget', help="增长预算JSON文件，覆盖默认值中的同名项")
+    parser.add_argument('-o', '--output', help="记录和检查结果JSON文件")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    budget = dict(DEFAULT_BUDGET)
+    if args.budget:
+        with open(args.budget, 'r', encoding='utf-8') as f:
+            budget.update(json.load(f))
+
+    source = args.file or SyntheticRecording(SyntheticSpec(seed=args.seed),
+                                             duration=args.hours * 3600.0)
+    run = run_headless if args.headless else run_gui
+    samples = run(source, args.speed, args.sample_interval)
+    violations = check_budget(samples, budget)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'generated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'source': args.file or f"synthetic {args.hours:g}h seed{args.seed}",
+                'mode': 'headless' if args.headless else 'gui',
+                'budget': budget,
+                'violations': violations,
+                'samples': samples,
+            }, f, ensure_ascii=False, indent=2)
+
+    for line in violations:
+        print(f"❌ {line}")
+    if violations:
+        return 1
+    print("✅ 增长均在预算内")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
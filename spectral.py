@@ -0,0 +1,112 @@
+"""频谱特征提取
+
+按帧长缓存rfft频率轴、窗函数和频段掩码，每帧只做一次实数FFT，
+同时得到主频率、检测频段内能量和频段外能量，可选各频带能量。
+输入可以是单帧一维数组，也可以是 (帧数, 帧长) 的二维批量。
+"""
+import functools
+from collections import namedtuple
+
+import numpy as np
+
+SpectralFeatures = namedtuple('SpectralFeatures', ['frequency', 'in_band', 'out_band', 'bands'])
+
+
+class SpectralExtractor:
+    """固定采样率和帧长的频谱特征提取器"""
+
+    def __init__(self, sample_rate, frame_size, window='hann'):
+        self.sample_rate = sample_rate
+        self.frame_size = frame_size
+        self.frequencies = np.fft.rfftfreq(frame_size, 1.0 / sample_rate)
+        # Hann窗减少频谱泄漏，主频率不再被相邻强峰拖偏
+        if window == 'hann' and frame_size > 1:
+            self.window = np.hanning(frame_size).astype(np.float32)
+        else:
+            self.window = None
+        # 主频率只在正频率中搜索: 去掉直流分量和偶数帧长时的奈奎斯特分量
+        self._positive = slice(1, (frame_size + 1) // 2)
+        self._band_masks = {}
+        self._band_starts = {}
+
+    def band_mask(self, min_frequency, max_frequency):
+        """检测频段内的频点掩码（不含直流分量）"""
+        key = (min_frequency, max_frequency)
+        mask = self._band_masks.get(key)
+        if mask is None:
+            mask = ((self.frequencies >= min_frequency) & (self.frequencies <= max_frequency))
+            mask[0] = False
+            self._band_masks[key] = mask
+        return mask
+
+    def _band_layout(self, band_edges):
+        """各频带在频率轴上的起点，以及空频带（含高于奈奎斯特频率的频带）"""
+        band_edges = tuple(band_edges)
+        layout = self._band_starts.get(band_edges)
+        if layout is None:
+            bins = self.frequencies
+            edges = np.searchsorted(bins, list(band_edges) + [bins[-1] + 1])
+            starts = np.minimum(edges[:-1], len(bins) - 1)
+            layout = (starts, edges[:-1] >= edges[1:])
+            self._band_starts[band_edges] = layout
+        return layout
+
+    def power(self, frames):
+        """逐帧功率谱"""
+        if self.window is not None:
+            frames = frames * self.window
+        spectrum = np.fft.rfft(frames, axis=-1)
+        return spectrum.real ** 2 + spectrum.imag ** 2
+
+    def analyze(self, frames, min_frequency=None, max_frequency=None, band_edges=None):
+        """计算主频率、频段内外能量和可选的各频带能量
+
+        一维输入返回标量，二维输入返回逐帧数组。
+        未给出检测频段时频段内外能量为None。
+        """
+        frames = np.asarray(frames)
+        single = frames.ndim == 1
+        if single:
+            frames = frames[np.newaxis, :]
+        power = self.power(frames)
+
+        positive = power[:, self._positive]
+        if positive.shape[1] == 0:
+            frequency = np.zeros(len(frames))
+        else:
+            frequency = (np.argmax(positive, axis=1) + 1) * (self.sample_rate / self.frame_size)
+
+        in_band = out_band = None
+        if min_frequency is not None and max_frequency is not None:
+            mask = self.band_mask(min_frequency, max_frequency)
+            in_band = power[:, mask].sum(axis=1, dtype=np.float64)
+            out_band = power[:, 1:].sum(axis=1, dtype=np.float64) - in_band
+
+        bands = None
+        if band_edges is not None:
+            starts, empty = self._band_layout(band_edges)
+            bands = np.add.reduceat(power, starts, axis=1)
+            # 空频带reduceat会返回单个频点的值，置零
+            bands[:, empty] = 0.0
+
+        if single:
+            return SpectralFeatures(
+                float(frequency[0]),
+                None if in_band is None else float(in_band[0]),
+                None if out_band is None else float(max(out_band[0], 0.0)),
+                None if bands is None else bands[0])
+        if out_band is not None:
+            np.maximum(out_band, 0.0, out=out_band)
+        return SpectralFeatures(frequency, in_band, out_band, bands)
+
+
+@functools.lru_cache(maxsize=16)
+def get_extractor(sample_rate, frame_size):
+    """按采样率和帧长复用提取器"""
+    return SpectralExtractor(sample_rate, frame_size)
+
+
+def band_ratio(in_band, out_band):
+    """频段内能量占比，无能量时为0"""
+    total = in_band + out_band
+    return in_band / total if total > 0 else 0.0
@@ -0,0 +1,58 @@
+"""增量统计
+
+每次加入一个数据点的代价是常数，不随桩内锤击数或班次内桩数增长。
+"""
+import math
+
+
+class RunningStats:
+    """Welford增量统计: 数量、总和、均值、方差、最小值、最大值和速率"""
+
+    __slots__ = ('count', 'total', 'mean', '_m2', 'min', 'max', 'first_time', 'last_time')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+        self.first_time = None
+        self.last_time = None
+
+    def add(self, value, timestamp=None):
+        """加入一个数据点"""
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if timestamp is not None:
+            if self.first_time is None:
+                self.first_time = timestamp
+            self.last_time = timestamp
+
+    @property
+    def variance(self):
+        """总体方差（与np.var一致）"""
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        """总体标准差（与np.std一致）"""
+        return math.sqrt(self.variance)
+
+    def rate_per_minute(self, now=None):
+        """从第一个数据点到now（默认最后一个数据点）的每分钟数量"""
+        if self.first_time is None:
+            return 0.0
+        end = self.last_time if now is None else now
+        duration = end - self.first_time
+        return self.count / duration * 60 if duration > 0 else 0.0
@@ -0,0 +1,161 @@
+"""合成打桩录音
+
+按给定的锤击频率、频段、衰减、信噪比、现场噪声和桩间间隔生成可复现的打桩音频，
+同时给出每次锤击的真实时间，用于基准测试和检测准确率评估。
+音频按块生成，长录音直接逐块写入WAV，内存占用与录音长度无关。
+"""
+import math
+import wave
+from collections import namedtuple
+
+import numpy as np
+
+SyntheticSpec = namedtuple('SyntheticSpec', [
+    'duration',         # 录音时长（秒）
+    'sample_rate',
+    'strike_rate',      # 每分钟锤击数
+    'rate_jitter',      # 锤击间隔的相对随机抖动
+    'min_frequency',    # 锤击主频率范围 (Hz)
+    'max_frequency',
+    'decay',            # 锤击衰减时间常数（秒）
+    'amplitude',        # 锤击峰值幅度
+    'snr_db',           # 锤击峰值有效值与宽带噪声有效值之比 (dB)
+    'rumble_level',     # 现场机械低频噪声（50Hz工频及谐波）幅度
+    'click_rate',       # 频段外干扰瞬态（金属碰撞等）每分钟次数
+    'pile_duration',    # 每根桩的打桩时长（秒）
+    'pile_gap',         # 桩与桩之间的静默时长（秒）
+    'seed',
+], defaults=(600.0, 44100, 40.0, 0.1, 150.0, 600.0, 0.04, 0.5, 20.0, 0.02, 2.0,
+             300.0, 240.0, 0))
+
+# 锤击和干扰瞬态在衰减到该倍数时间常数后不再计算
+TAIL_DECAYS = 8
+CLICK_FREQUENCY = (5000.0, 7000.0)
+CLICK_DECAY = 0.003
+RUMBLE_HARMONICS = ((50.0, 1.0), (100.0, 0.5), (150.0, 0.25))
+
+
+class SyntheticRecording:
+    """按SyntheticSpec生成的合成录音及其真实锤击时间
+
+    strike_times / strike_frequencies / strike_amplitudes: 每次锤击的起始时间、主频率和幅度
+    piles: 每根桩的 (开始时间, 最后一次锤击时间, 锤击数)
+    相同的spec和block_size总是生成相同的音频。
+    """
+
+    def __init__(self, spec=None, **overrides):
+        self.spec = (spec or SyntheticSpec())._replace(**overrides)
+        self.sample_rate = self.spec.sample_rate
+        self.n_frames = int(self.spec.duration * self.sample_rate)
+        rng = np.random.default_rng([self.spec.seed, 0])
+        self._schedule_strikes(rng)
+        self._schedule_clicks(rng)
+
+    @property
+    def duration(self):
+        return self.n_frames / self.sample_rate
+
+    def _schedule_strikes(self, rng):
+        spec = self.spec
+        interval = 60.0 / spec.strike_rate
+        end = spec.duration - TAIL_DECAYS * spec.decay
+        times, self.piles = [], []
+        start = min(1.0, end)
+        while start < end:
+            t, count = start, 0
+            while t < min(start + spec.pile_duration, end):
+                times.append(t)
+                count += 1
+                t += interval * (1 + spec.rate_jitter * rng.uniform(-1, 1))
+            self.piles.append((start, times[-1], count))
+            start = times[-1] + spec.pile_gap
+        self.strike_times = np.array(times)
+        self.strike_frequencies = rng.uniform(spec.min_frequency, spec.max_frequency, len(times))
+        self.strike_amplitudes = spec.amplitude * rng.uniform(0.7, 1.0, len(times))
+
+    def _schedule_clicks(self, rng):
+        spec = self.spec
+        count = rng.poisson(spec.click_rate * spec.duration / 60.0)
+        self.click_times = np.sort(rng.uniform(0, spec.duration, count))
+        self.click_frequencies = rng.uniform(*CLICK_FREQUENCY, count)
+        self.click_amplitudes = spec.amplitude * rng.uniform(0.3, 1.0, count)
+
+    @property
+    def noise_std(self):
+        """宽带噪声标准差，锤击峰值有效值按 amplitude/sqrt(2) 计算"""
+        return self.spec.amplitude / math.sqrt(2) * 10 ** (-self.spec.snr_db / 20)
+
+    def render(self, start, count, block_index=0):
+        """生成 [start, start+count) 采样区间的float32音频"""
+        spec, rate = self.spec, self.sample_rate
+        noise_rng = np.random.default_rng([spec.seed, 1, block_index])
+        block = noise_rng.standard_normal(count) * self.noise_std
+        t = (start + np.arange(count)) / rate
+        for frequency, level in RUMBLE_HARMONICS:
+            block += spec.rumble_level * level * np.sin(2 * np.pi * frequency * t)
+        self._add_transients(block, start, self.strike_times, self.strike_frequencies,
+                             self.strike_amplitudes, spec.decay)
+        self._add_transients(block, start, self.click_times, self.click_frequencies,
+                             self.click_amplitudes, CLICK_DECAY)
+        return block.astype(np.float32)
+
+    def _add_transients(self, block, start, times, frequencies, amplitudes, decay):
+        """叠加与本块重叠的衰减正弦瞬态"""
+        rate, end = self.sample_rate, start + len(block)
+        tail = TAIL_DECAYS * decay
+        first = np.searchsorted(times, (start / rate) - tail)
+        last = np.searchsorted(times, end / rate)
+        for onset, frequency, amplitude in zip(times[first:last], frequencies[first:last],
+                                               amplitudes[first:last]):
+            onset_sample = int(math.ceil(onset * rate))
+            lo = max(onset_sample, start)
+            hi = min(onset_sample + int(tail * rate), end)
+            if lo >= hi:
+                continue
+            t = (np.arange(lo, hi) - onset * rate) / rate
+            block[lo - start:hi - start] += amplitude * np.exp(-t / decay) * np.sin(2 * np.pi * frequency * t)
+
+    def blocks(self, block_size=1024 * 2048):
+        """逐块输出float32音频（与audio_io读取器的接口一致）"""
+        for index, start in enumerate(range(0, self.n_frames, block_size)):
+            yield self.render(start, min(block_size, self.n_frames - start), index)
+
+    def read(self):
+        """生成全部音频"""
+        blocks = list(self.blocks())
+        return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+
+    def write_wav(self, filename, block_size=1024 * 2048):
+        """逐块写入16位单声道WAV"""
+        with wave.open(filename, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(self.sample_rate)
+            for block in self.blocks(block_size):
+                f.writeframes((np.clip(block, -1.0, 1.0) * 32767).astype('<i2').tobytes())
+
+    def truth(self):
+        """可JSON序列化的真实锤击信息"""
+        return {
+            'spec': self.spec._asdict(),
+            'strike_times': self.strike_times.tolist(),
+            'pile_strikes': [count for _, _, count in self.piles],
+        }
+
+
+def match_strikes(detected, truth, tolerance=0.1):
+    """把检测到的锤击时间与真实时间一一匹配，返回 (匹配数, 漏检数, 误检数)
+
+    检测时间与真实时间相差不超过tolerance秒即算匹配（帧时间是帧起点，可能早于锤击起始），
+    每个真实锤击最多匹配一次。
+    """
+    detected = np.sort(np.asarray(detected, dtype=np.float64))
+    truth = np.sort(np.asarray(truth, dtype=np.float64))
+    matched = i = 0
+    for t in detected:
+        while i < len(truth) and truth[i] < t - tolerance:
+            i += 1
+        if i < len(truth) and truth[i] <= t + tolerance:
+            matched += 1
+            i += 1
+    return matched, len(truth) - matched, len(detected) - matched
@@ -0,0 +1,86 @@
+"""测试共用的合成打桩录音"""
+import os
+import sys
+import wave
+from collections import namedtuple
+
+import numpy as np
+import pytest
+
+# 模块平铺在仓库根目录
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detector import StrikeDetector  # noqa: E402
+
+CHUNK_SIZE = 1024
+
+# 检测参数与合成录音配套；静默时长缩短到桩间间隔以内
+DETECTION_PARAMS = {
+    'threshold': 0.1,
+    'min_frequency': 80,
+    'max_frequency': 2000,
+    'min_interval': 0.3,
+    'silence_duration': 15.0,
+}
+
+Recording = namedtuple('Recording', ['sample_rate', 'audio', 'strike_times', 'pile_strikes'])
+
+
+def synthesize(duration=150.0, sample_rate=44100, interval=1.5, pile_duration=40.0,
+               pile_gap=30.0, seed=0):
+    """宽带噪声和50Hz工频上叠加衰减正弦锤击，按打桩时长和桩间间隔分成若干根桩"""
+    rng = np.random.default_rng(seed)
+    n = int(duration * sample_rate)
+    audio = rng.normal(0.0, 0.03, n)
+    audio += 0.02 * np.sin(2 * np.pi * 50.0 * np.arange(n) / sample_rate)
+    strike_times, pile_strikes = [], []
+    pile_start = 1.0
+    while pile_start < duration - 1.0:
+        t, count = pile_start, 0
+        while t < min(pile_start + pile_duration, duration - 1.0):
+            strike_times.append(t)
+            count += 1
+            t += interval * (1.0 + rng.uniform(-0.1, 0.1))
+        pile_strikes.append(count)
+        pile_start += pile_duration + pile_gap
+    decay = np.arange(int(0.3 * sample_rate)) / sample_rate
+    for t in strike_times:
+        start = int(t * sample_rate)
+        frequency = rng.uniform(150.0, 600.0)
+        audio[start:start + len(decay)] += (0.5 * np.exp(-decay / 0.04) *
+                                            np.sin(2 * np.pi * frequency * decay))
+    return Recording(sample_rate, audio.astype(np.float32), np.array(strike_times), pile_strikes)
+
+
+def write_wav(filename, recording):
+    with wave.open(filename, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(recording.sample_rate)
+        f.writeframes((np.clip(recording.audio, -1.0, 1.0) * 32767).astype('<i2').tobytes())
+
+
+@pytest.fixture(scope='session')
+def recording():
+    return synthesize()
+
+
+@pytest.fixture(scope='session')
+def recording_wav(recording, tmp_path_factory):
+    filename = str(tmp_path_factory.mktemp('audio') / 'synthetic.wav')
+    write_wav(filename, recording)
+    return filename
+
+
+@pytest.fixture(scope='session')
+def detection_params():
+    return dict(DETECTION_PARAMS)
+
+
+@pytest.fixture(scope='session')
+def make_detector(recording):
+    """按合成录音的采样率和配套参数创建检测引擎，关键字参数覆盖默认参数"""
+    def make(**overrides):
+        params = dict(DETECTION_PARAMS, **overrides)
+        return StrikeDetector(sample_rate=recording.sample_rate, chunk_size=CHUNK_SIZE, **params)
+    return make
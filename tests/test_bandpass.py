@@ -0,0 +1,39 @@
+"""带通包络与逐采样直接型滤波的一致性"""
+import numpy as np
+
+from bandpass import BandpassEnvelope, design_biquad, zero_crossing_frequency
+
+
+def direct_form(x, b, a):
+    """逐采样直接I型双二阶节，作为参考实现"""
+    y = np.zeros(len(x))
+    x1 = x2 = y1 = y2 = 0.0
+    for n, value in enumerate(x):
+        y[n] = b[0] * value + b[1] * x1 + b[2] * x2 - a[1] * y1 - a[2] * y2
+        x1, x2, y1, y2 = value, x1, y[n], y1
+    return y
+
+
+def test_blockwise_matches_direct_form(recording, detection_params):
+    rate = recording.sample_rate
+    x = recording.audio[:rate].astype(np.float64)
+    bandpass = BandpassEnvelope(rate, detection_params['min_frequency'],
+                                detection_params['max_frequency'])
+    outputs = [bandpass.process(x[i:i + 1024]) for i in range(0, len(x), 1024)]
+    filtered = np.concatenate([y for y, _ in outputs])
+    envelope = np.concatenate([e for _, e in outputs])
+
+    expected = direct_form(x, *design_biquad('highpass', detection_params['min_frequency'], rate))
+    expected = direct_form(expected, *design_biquad('lowpass', detection_params['max_frequency'], rate))
+    np.testing.assert_allclose(filtered, expected, atol=1e-12)
+    power = direct_form(expected * expected, [1 - bandpass.envelope_pole, 0.0, 0.0],
+                        [1.0, -bandpass.envelope_pole, 0.0])
+    np.testing.assert_allclose(envelope, np.sqrt(np.maximum(power, 0.0)), atol=1e-9)
+
+
+def test_zero_crossing_frequency():
+    rate = 44100
+    t = np.arange(4096) / rate
+    frames = np.sin(2 * np.pi * np.array([[230.0], [1234.5]]) * t + 0.3)
+    np.testing.assert_allclose(zero_crossing_frequency(frames, rate), [230.0, 1234.5], rtol=1e-3)
+    assert zero_crossing_frequency(np.ones(16), rate)[0] == 0.0
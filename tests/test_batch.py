@@ -0,0 +1,24 @@
+"""命令行批量分析"""
+import json
+
+import batch
+from conftest import write_wav
+
+
+def test_duplicate_names_follow_input_order(recording, detection_params, tmp_path):
+    """不同目录下的同名录音按输入顺序编号，与各文件完成的先后无关"""
+    # 第一个文件最长、最后完成
+    lengths = {'a': len(recording.audio), 'b': recording.sample_rate, 'c': recording.sample_rate}
+    for directory, length in lengths.items():
+        (tmp_path / directory).mkdir()
+        write_wav(str(tmp_path / directory / 'rec.wav'),
+                  recording._replace(audio=recording.audio[:length]))
+    config = tmp_path / 'config.json'
+    config.write_text(json.dumps(dict(detection_params, file_analysis_threshold_multiplier=1.0)))
+    output = tmp_path / 'out'
+
+    batch.main([str(tmp_path / directory) for directory in lengths] +
+               ['-o', str(output), '-c', str(config), '-j', '3'])
+    for directory, name in zip(lengths, ['rec', 'rec_2', 'rec_3']):
+        result = json.loads((output / f'{name}.piles.json').read_text(encoding='utf-8'))
+        assert result['file'] == str(tmp_path / directory / 'rec.wav')
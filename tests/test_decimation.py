@@ -0,0 +1,39 @@
+"""抽取降采样前后的检测结果"""
+import numpy as np
+import pytest
+
+from detector import PileEvent, StrikeEvent
+
+
+@pytest.mark.parametrize('decimate', [False, True])
+@pytest.mark.parametrize('detection_mode', ['fft', 'iir'])
+def test_strike_counts(recording, make_detector, detection_mode, decimate):
+    detector = make_detector(detection_mode=detection_mode, decimate=decimate)
+    events = detector.process_features(*detector.extract_features(recording.audio))
+    strikes = [event for event in events if isinstance(event, StrikeEvent)]
+    piles = [event.pile.strikes for event in events if isinstance(event, PileEvent)]
+    assert len(strikes) == len(recording.strike_times) == 59
+    assert piles == recording.pile_strikes[:-1] == [27, 26]
+    assert detector.current_pile_strikes == recording.pile_strikes[-1] == 6
+
+
+def test_fft_volumes_unchanged(recording, make_detector):
+    """FFT模式的音量按原始采样计算，抽取不改变阈值的含义"""
+    full = make_detector(decimate=False).extract_features(recording.audio)
+    decimated = make_detector(decimate=True).extract_features(recording.audio)
+    np.testing.assert_array_equal(decimated[0], full[0])
+    np.testing.assert_array_equal(decimated[1], full[1])
+
+
+@pytest.mark.parametrize('tail', [0, 5, 1020])
+def test_fft_volumes_chunked(recording, make_detector, tail):
+    """分段调用且末尾不足一帧时音量与整段计算一致"""
+    detector = make_detector(decimate=True)
+    chunk_size = detector.chunk_size
+    audio = recording.audio[:chunk_size * 800 + tail]
+    split = chunk_size * 300
+    parts = [detector.extract_features(audio[:split]),
+             detector.extract_features(audio[split:], start_sample=split, volume_gate=0.1)]
+    times, volumes, _ = make_detector(decimate=False).extract_features(audio)
+    np.testing.assert_array_equal(np.concatenate([p[0] for p in parts]), times)
+    np.testing.assert_array_equal(np.concatenate([p[1] for p in parts]), volumes)
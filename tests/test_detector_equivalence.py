@@ -0,0 +1,134 @@
+"""批量接口与逐帧状态机的一致性"""
+import numpy as np
+import pytest
+
+from detector import (PileEvent, StrikeEvent, compute_volume, frame_signal, select_strikes,
+                      split_piles, sweep_thresholds)
+
+
+@pytest.fixture(scope='module')
+def features(recording, make_detector):
+    return make_detector().extract_features(recording.audio)
+
+
+def summarize(events):
+    """事件列表中可比较的部分: 锤击的时间和编号，桩完成的时间"""
+    return [('strike', event.time, event.pile_number, event.strike_number)
+            if isinstance(event, StrikeEvent) else ('pile', event.time)
+            for event in events]
+
+
+def pile_counts(events):
+    """按锤击事件的桩号统计各桩锤击数（含未完成的桩）"""
+    counts = {}
+    for event in events:
+        if isinstance(event, StrikeEvent):
+            counts[event.pile_number] = event.strike_number
+    return [counts[number] for number in sorted(counts)]
+
+
+def test_extract_features_matches_frames(recording, make_detector, features):
+    times, volumes, _ = features
+    audio, chunk_size = recording.audio, make_detector().chunk_size
+    frames = frame_signal(audio, chunk_size)
+    expected = [compute_volume(frame) for frame in frames]
+    expected.append(compute_volume(audio[len(frames) * chunk_size:]))
+    np.testing.assert_allclose(volumes, expected, rtol=1e-6)
+    np.testing.assert_array_equal(times, np.arange(len(volumes)) * chunk_size / recording.sample_rate)
+
+
+def test_extract_features_chunked(recording, make_detector, features):
+    """分块调用的特征与整段计算逐位相同"""
+    detector = make_detector()
+    split = detector.chunk_size * 2048
+    parts = [detector.extract_features(recording.audio[start:start + split], start)
+             for start in range(0, len(recording.audio), split)]
+    for chunked, whole in zip(zip(*parts), features):
+        np.testing.assert_array_equal(np.concatenate(chunked), whole)
+
+
+def test_process_features_matches_update(recording, make_detector, features):
+    expected = make_detector()
+    frame_events = []
+    for t, v, f in zip(*features):
+        frame_events.extend(expected.update(float(t), float(v), float(f)))
+
+    detector = make_detector()
+    events = detector.process_features(*features)
+    assert summarize(events) == summarize(frame_events)
+    assert pile_counts(events) == recording.pile_strikes
+    assert sum(isinstance(event, PileEvent) for event in events) == len(recording.pile_strikes) - 1
+    assert list(detector.strike_times) == list(expected.strike_times)
+    assert detector.total_strikes == expected.total_strikes == len(recording.strike_times)
+
+
+@pytest.mark.parametrize('detection_mode', ['fft', 'iir'])
+def test_process_block_matches_process_signal(recording, make_detector, detection_mode):
+    """实时逐块处理与文件批量处理得到相同的锤击"""
+    streaming = make_detector(detection_mode=detection_mode)
+    audio, chunk_size = recording.audio, streaming.chunk_size
+    block_events = []
+    for start in range(0, len(audio), chunk_size):
+        block_events.extend(streaming.process_block(audio[start:start + chunk_size]))
+    events = make_detector(detection_mode=detection_mode).process_signal(audio)
+    assert [type(event) for event in events] == [type(event) for event in block_events]
+    # IIR模式的锤击时间由块起点加峰值偏移算出，与按采样位置直接计算相差浮点舍入
+    np.testing.assert_allclose([event.time for event in events],
+                               [event.time for event in block_events], rtol=0, atol=1e-9)
+    assert pile_counts(events) == pile_counts(block_events) == recording.pile_strikes
+
+
+def test_sweep_thresholds_matches_detector(make_detector, detection_params, features):
+    thresholds = np.linspace(0.02, 0.3, 15)
+    params = {key: value for key, value in detection_params.items() if key != 'threshold'}
+    counts = sweep_thresholds(*features, thresholds, **params)
+    expected = []
+    for threshold in thresholds:
+        events = make_detector(threshold=threshold).process_features(*features)
+        expected.append(sum(isinstance(event, StrikeEvent) for event in events))
+    assert counts.tolist() == expected
+
+
+@pytest.mark.parametrize('threshold', [0.05, 0.1, 0.2])
+def test_select_strikes_matches_detector(make_detector, detection_params, features, threshold):
+    detector = make_detector(threshold=threshold)
+    events = detector.process_features(*features)
+    events.extend(detector.finish())
+    strike_times = [event.time for event in events if isinstance(event, StrikeEvent)]
+
+    params = dict(detection_params, threshold=threshold)
+    selected = select_strikes(*features, **params)
+    np.testing.assert_array_equal(selected, strike_times)
+    assert split_piles(selected, params['silence_duration']) == pile_counts(events)
+
+
+@pytest.mark.parametrize('detection_mode', ['fft', 'iir'])
+def test_gated_process_signal_matches_ungated(recording, make_detector, detection_mode):
+    """音量门限只跳过不可能成为锤击的帧的频率计算，不改变检测结果"""
+    ungated = make_detector(detection_mode=detection_mode)
+    expected = ungated.process_features(*ungated.extract_features(recording.audio))
+
+    detector = make_detector(detection_mode=detection_mode)
+    split = detector.chunk_size * 2048
+    events = []
+    for start in range(0, len(recording.audio), split):
+        events.extend(detector.process_signal(recording.audio[start:start + split]))
+    assert summarize(events) == summarize(expected)
+    assert pile_counts(events) == recording.pile_strikes
+
+
+@pytest.mark.parametrize('detection_mode', ['fft', 'iir'])
+def test_gated_block_keeps_display_frequency(recording, make_detector, detection_mode):
+    """跳过频率计算的安静块不把界面显示的主频率清零"""
+    detector = make_detector(detection_mode=detection_mode)
+    rate, size = recording.sample_rate, detector.chunk_size
+    strike = int(recording.strike_times[0] * rate)
+    shown = None
+    for start in range(strike, strike + int(0.7 * rate), size):
+        detector.process_block(recording.audio[start:start + size])
+        if detector.last_volume > detector.threshold:
+            shown = detector.last_frequency, detector.last_band_ratio
+    assert detector.last_volume < detector.threshold
+    assert shown[0] > 0 and detector.last_frequency == shown[0]
+    if detection_mode == 'fft':
+        assert detector.last_band_ratio == shown[1]
@@ -0,0 +1,61 @@
+"""逐块特征缓存"""
+import os
+
+import numpy as np
+import pytest
+
+from detector import StrikeEvent
+from feature_cache import FeatureCache, load_features
+
+
+def load(recording_wav, cache, detection_params, mode, **kwargs):
+    return load_features(recording_wav, cache, 1024, detection_mode=mode,
+                         min_frequency=detection_params['min_frequency'],
+                         max_frequency=detection_params['max_frequency'], **kwargs)
+
+
+@pytest.mark.parametrize('mode', ['fft', 'iir'])
+def test_cached_features_match_computed(recording_wav, detection_params, tmp_path, mode):
+    cache = FeatureCache(str(tmp_path / 'cache'))
+    computed = load(recording_wav, cache, detection_params, mode)
+    cached = load(recording_wav, cache, detection_params, mode)
+    assert not computed['cached'] and cached['cached']
+    assert cached['n_samples'] == computed['n_samples']
+    for name in ('times', 'volumes', 'frequencies'):
+        np.testing.assert_array_equal(cached[name], computed[name])
+    np.testing.assert_allclose(cached['band_energies'], computed['band_energies'], rtol=1e-6)
+
+    # 从断点续算时跳过缓存中start_sample之前的帧
+    skip = 3000
+    resumed = load(recording_wav, cache, detection_params, mode, start_sample=skip * 1024)
+    assert resumed['cached'] and resumed['n_samples'] == computed['n_samples']
+    np.testing.assert_array_equal(resumed['times'], computed['times'][skip:])
+
+
+def test_streaming_matches_full(recording_wav, detection_params, make_detector, tmp_path):
+    """keep=False时逐块送入状态机，结果与整段特征一次处理相同（计算和读缓存两种情况）"""
+    cache = FeatureCache(str(tmp_path / 'cache'))
+    full = load(recording_wav, None, detection_params, 'fft')
+    expected = make_detector().process_features(full['times'], full['volumes'], full['frequencies'])
+
+    for _ in range(2):
+        detector = make_detector()
+        events = []
+        result = load(recording_wav, cache, detection_params, 'fft', keep=False,
+                      on_features=lambda end, total, part: events.extend(
+                          detector.process_features(*part[:3])))
+        assert result['times'] is None
+        assert ([event.time for event in events if isinstance(event, StrikeEvent)] ==
+                [event.time for event in expected if isinstance(event, StrikeEvent)])
+    assert result['cached']
+
+
+def test_stopped_analysis_not_cached(recording_wav, detection_params, tmp_path):
+    cache = FeatureCache(str(tmp_path / 'cache'))
+    parts = []
+    result = load(recording_wav, cache, detection_params, 'fft',
+                  should_stop=lambda: len(parts) >= 1,
+                  on_features=lambda end, total, part: parts.append(end))
+    assert not result['cached'] and result['n_samples'] == parts[-1]
+    assert os.listdir(cache.directory) == []
+    assert not load(recording_wav, cache, detection_params, 'fft')['cached']
@@ -0,0 +1,154 @@
+"""检测参数优化
+
+逐帧特征只提取一次，所有候选参数都在缓存的特征数组上评估。
+"""
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from detector import select_candidates, split_piles, sweep_thresholds
+
+THRESHOLD_RANGE = (0.02, 0.8)
+THRESHOLD_STEP = 0.005
+
+TUNING_PARAMS = ('threshold', 'min_frequency', 'max_frequency', 'min_interval', 'silence_duration')
+
+DEFAULT_GRID = {
+    'threshold': np.round(np.arange(0.02, 0.8, 0.01), 3).tolist(),
+    'min_frequency': [20, 50, 80, 100, 150, 200],
+    'max_frequency': [300, 500, 800, 1000, 1500, 2000, 3000, 5000],
+    'min_interval': [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.8, 1.0],
+    'silence_duration': [30, 60, 120, 300, 600],
+}
+
+
+def optimize_threshold(features, true_count, min_frequency=80, max_frequency=2000,
+                       min_interval=0.3, silence_duration=600.0,
+                       low=THRESHOLD_RANGE[0], high=THRESHOLD_RANGE[1],
+                       step=THRESHOLD_STEP, refine=10):
+    """搜索使锤击数最接近真实值的阈值
+
+    先在[low, high)上按step粗扫，再在最佳值附近以step/refine细扫。
+    返回 (最佳阈值, 对应锤击数)。
+    """
+    times, volumes, frequencies = features
+    params = dict(min_frequency=min_frequency, max_frequency=max_frequency,
+                  min_interval=min_interval, silence_duration=silence_duration)
+
+    thresholds = np.arange(low, high, step)
+    counts = sweep_thresholds(times, volumes, frequencies, thresholds, **params)
+    best = int(np.argmin(np.abs(counts - true_count)))
+
+    if refine > 1:
+        fine = np.arange(max(low, thresholds[best] - step),
+                         min(high, thresholds[best] + step), step / refine)
+        fine_counts = sweep_thresholds(times, volumes, frequencies, fine, **params)
+        thresholds = np.concatenate([thresholds, fine])
+        counts = np.concatenate([counts, fine_counts])
+        best = int(np.argmin(np.abs(counts - true_count)))
+
+    return round(float(thresholds[best]), 4), int(counts[best])
+
+
+# 工作进程中的特征数组，由_init_worker设置，避免每个任务重复传输
+_worker_features = None
+
+
+def _init_worker(features):
+    global _worker_features
+    _worker_features = features
+
+
+def count_error(counts, target):
+    """计数误差: 目标为总数时取绝对差，为各桩锤击数列表时逐桩比较（缺少的桩按0计）"""
+    if np.isscalar(target):
+        return abs(sum(counts) - target)
+    n = max(len(counts), len(target))
+    counts = np.pad(np.asarray(counts, dtype=int), (0, n - len(counts)))
+    target = np.pad(np.asarray(target, dtype=int), (0, n - len(target)))
+    return int(np.abs(counts - target).sum())
+
+
+def _evaluate_band(task):
+    """评估一个频段下所有阈值、最小间隔和静默时长的组合"""
+    min_frequency, max_frequency, grid, target = task
+    times, volumes, frequencies = _worker_features
+    band = (frequencies >= min_frequency) & (frequencies <= max_frequency)
+    band_times = np.asarray(times, dtype=np.float64)[band]
+    band_volumes = np.asarray(volumes)[band]
+
+    results = []
+    for min_interval in grid['min_interval']:
+        for threshold in grid['threshold']:
+            candidate_times = band_times[band_volumes > threshold]
+            # 锤击选择只取决于min(min_interval, silence_duration)，相同时复用
+            selected = {}
+            for silence_duration in grid['silence_duration']:
+                min_gap = min(min_interval, silence_duration)
+                if min_gap not in selected:
+                    selected[min_gap] = candidate_times[select_candidates(candidate_times, min_gap)]
+                strike_times = selected[min_gap]
+                piles = split_piles(strike_times, silence_duration)
+                results.append({
+                    'threshold': threshold,
+                    'min_frequency': min_frequency,
+                    'max_frequency': max_frequency,
+                    'min_interval': min_interval,
+                    'silence_duration': silence_duration,
+                    'count': len(strike_times),
+                    'piles': len(piles),
+                    'error': count_error(piles, target),
+                })
+    return results
+
+
+def tune_parameters(features, target, grid=None, processes=None):
+    """联合搜索阈值、频段、最小间隔和静默时长
+
+    target为真实总锤击数，或各桩真实锤击数的列表（此时静默时长参与分桩比较）。
+    按频段把任务分配到进程池，processes=1时在当前进程内计算。
+    返回 {'best': 最佳参数, 'sensitivity': 各参数单独变化时的误差表, 'evaluated': 组合数}。
+    """
+    grid = {name: list(values) for name, values in dict(DEFAULT_GRID, **(grid or {})).items()}
+    if np.isscalar(target):
+        # 只比较总数时静默时长不影响计数，取网格中的最大值即可
+        grid['silence_duration'] = [max(grid['silence_duration'])]
+
+    tasks = [(low, high, grid, target)
+             for low, high in itertools.product(grid['min_frequency'], grid['max_frequency'])
+             if low < high]
+
+    if processes == 1:
+        _init_worker(features)
+        batches = map(_evaluate_band, tasks)
+        results = [row for batch in batches for row in batch]
+    else:
+        # 界面中从工作线程调用，用spawn避免fork复制其他线程持有的锁和Tk状态
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(features,),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            results = [row for batch in pool.map(_evaluate_band, tasks) for row in batch]
+
+    if not results:
+        raise ValueError("参数网格为空")
+
+    best = min(results, key=lambda row: row['error'])
+    return {
+        'best': best,
+        'sensitivity': sensitivity_table(results, best),
+        'evaluated': len(results),
+    }
+
+
+def sensitivity_table(results, best):
+    """固定其余参数为最佳值，逐个参数列出误差随取值的变化"""
+    table = {}
+    for name in TUNING_PARAMS:
+        others = [other for other in TUNING_PARAMS if other != name]
+        rows = [row for row in results
+                if all(row[other] == best[other] for other in others)]
+        table[name] = [(row[name], row['count'], row['error'])
+                       for row in sorted(rows, key=lambda row: row[name])]
+    return table